@@ -0,0 +1,177 @@
+# affectation_camions.py
+
+"""
+Proposition automatique des associations employé -> camion.
+
+Chaque employé-jour de pointage est comparé aux horaires GPS de tous les camions
+roulant ce jour-là : le coût d'un couple (employé, camion) pour une journée est la
+moyenne des écarts absolus matin (arrivée GPS / début de pointage) et soir
+(fin de pointage / départ GPS), en minutes, plafonnée à ECART_MAX_JOUR. Un camion
+sans données GPS ce jour-là coûte le plafond.
+
+Le camion principal de chaque employé résulte d'un problème d'affectation sur le
+coût moyen de la période (un camion par employé). Le planning journalier garde ce
+camion tous les jours où il est compatible (coût < ECART_COMPATIBLE) ; les autres
+jours, l'employé est affecté, s'il y en a un, à un camion compatible que son propre
+chauffeur principal n'a pas conduit ce jour-là : c'est un changement de camion.
+"""
+
+import numpy as np
+import pandas as pd
+
+import analyse_core
+from instrumentation import mesure
+
+# Plafond du coût d'une journée : au-delà, le camion n'explique pas du tout le pointage
+ECART_MAX_JOUR = pd.Timedelta(minutes=60)
+# En dessous de cet écart moyen, une journée est expliquée par le camion
+ECART_COMPATIBLE = pd.Timedelta(minutes=30)
+
+
+def couts_journaliers(df_pointage, donnees_gps, regles=None):
+    """
+    Coût (minutes) de chaque triplet (nom_employe, date, plaque) pour lequel le camion
+    a des horaires GPS le jour où l'employé a pointé. Calculé en une jointure sur la date.
+    regles : regles_depot.ReglesDepot des horaires GPS (règles par défaut si None).
+    """
+    jours = analyse_core.jours_pointage(df_pointage)[['nom_employe', 'date', 'pointage_debut', 'pointage_fin']]
+    jours['nom_employe'] = jours['nom_employe'].astype(object)
+    horaires = analyse_core.horaires_gps(donnees_gps, regles=regles).copy()
+    horaires['plaque'] = horaires['plaque'].astype(object)
+    paires = jours.merge(horaires, on='date')
+
+    plafond = ECART_MAX_JOUR.total_seconds() / 60
+    matin = ((paires['gps_arrivee'] - paires['pointage_debut']).abs().dt.total_seconds() / 60).clip(upper=plafond)
+    soir = ((paires['pointage_fin'] - paires['gps_depart']).abs().dt.total_seconds() / 60).clip(upper=plafond)
+    # Sans départ GPS valide le soir, seul le matin compte
+    paires['cout'] = pd.concat([matin, soir], axis=1).mean(axis=1, skipna=True).fillna(plafond)
+    return paires[['nom_employe', 'date', 'plaque', 'cout']]
+
+
+def _hongrois(couts):
+    """
+    Affectation de coût total minimal sur une matrice finie lignes x colonnes (algorithme
+    hongrois avec potentiels, O(n² m)) : chaque ligne ou chaque colonne, selon la plus petite
+    dimension, reçoit exactement un partenaire. Retourne (lignes, colonnes), comme
+    scipy.optimize.linear_sum_assignment.
+    """
+    transposee = couts.shape[0] > couts.shape[1]
+    if transposee:
+        couts = couts.T
+    n, m = couts.shape
+    # Indices à partir de 1 ; la colonne 0 est fictive et porte la ligne en cours d'insertion
+    u, v = np.zeros(n + 1), np.zeros(m + 1)
+    ligne_de = np.zeros(m + 1, dtype=int)
+    precedente = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        ligne_de[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        utilisees = np.zeros(m + 1, dtype=bool)
+        while True:
+            # Plus court chemin augmentant, toutes les colonnes libres mises à jour en une fois
+            utilisees[j0] = True
+            i0 = ligne_de[j0]
+            libres = ~utilisees[1:]
+            reduits = couts[i0 - 1] - u[i0] - v[1:]
+            ameliorees = libres & (reduits < minv[1:])
+            minv[1:][ameliorees] = reduits[ameliorees]
+            precedente[1:][ameliorees] = j0
+            candidats = np.where(libres, minv[1:], np.inf)
+            j1 = int(np.argmin(candidats)) + 1
+            delta = candidats[j1 - 1]
+            u[ligne_de[utilisees]] += delta
+            v[utilisees] -= delta
+            minv[1:][libres] -= delta
+            j0 = j1
+            if ligne_de[j0] == 0:
+                break
+        while j0:
+            j1 = precedente[j0]
+            ligne_de[j0] = ligne_de[j1]
+            j0 = j1
+    colonnes = np.flatnonzero(ligne_de[1:])
+    lignes = ligne_de[1:][colonnes] - 1
+    if transposee:
+        lignes, colonnes = colonnes, lignes
+    ordre = np.argsort(lignes)
+    return lignes[ordre], colonnes[ordre]
+
+
+def _affecter(couts, maximum):
+    """
+    Affectation un-pour-un de coût minimal sur une matrice lignes x colonnes ; les cases
+    à np.inf sont interdites et les couples de coût >= maximum ne sont pas retenus.
+    Utilise scipy si disponible, sinon _hongrois (même résultat optimal, en numpy ;
+    l'exécutable Windows est construit sans scipy). Retourne la liste des (ligne, colonne) retenus.
+    """
+    if couts.size == 0:
+        return []
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError:
+        linear_sum_assignment = _hongrois
+
+    lignes, colonnes = linear_sum_assignment(np.where(np.isfinite(couts), couts, maximum * 10))
+    return [(int(l), int(c)) for l, c in zip(lignes, colonnes) if couts[l, c] < maximum]
+
+
+@mesure("Association automatique", lambda resultat: len(resultat[1]))
+def proposer_affectations(df_pointage, donnees_gps, regles=None):
+    """
+    Propose un camion principal par employé et un planning journalier.
+    Retourne (affectations, planning) :
+    - affectations : {nom_employe: plaque}, sans les employés qu'aucun camion n'explique ;
+    - planning : DataFrame (nom_employe, date, plaque_camion, cout_minutes, changement),
+      une ligne par employé-jour attribué ; changement vaut True les jours où le camion
+      n'est pas le camion principal.
+    """
+    couts = couts_journaliers(df_pointage, donnees_gps, regles)
+    plafond = ECART_MAX_JOUR.total_seconds() / 60
+    planning_vide = pd.DataFrame({
+        'nom_employe': pd.Series(dtype=object), 'date': pd.Series(dtype='datetime64[ns]'),
+        'plaque_camion': pd.Series(dtype=object), 'cout_minutes': pd.Series(dtype=float),
+        'changement': pd.Series(dtype=bool),
+    })
+    if couts.empty:
+        return {}, planning_vide
+
+    # Coût moyen sur la période : les jours où le camion n'a pas roulé comptent le plafond
+    nb_jours = analyse_core.jours_pointage(df_pointage).groupby('nom_employe', observed=True).size()
+    nb_jours.index = nb_jours.index.astype(object)
+    gains = (plafond - couts['cout']).groupby([couts['nom_employe'], couts['plaque']]).sum().unstack(fill_value=0)
+    moyens = plafond - gains.div(nb_jours.reindex(gains.index), axis=0)
+    employes, plaques = moyens.index.to_list(), moyens.columns.to_list()
+    affectations = {
+        employes[l]: plaques[c] for l, c in _affecter(moyens.to_numpy(dtype=float), plafond)
+    }
+
+    # Planning : le camion principal les jours où il est compatible
+    seuil = ECART_COMPATIBLE.total_seconds() / 60
+    couts['principal'] = couts['nom_employe'].map(affectations)
+    compatibles = couts[couts['cout'] < seuil]
+    sur_principal = compatibles[compatibles['plaque'] == compatibles['principal']]
+    planning = sur_principal[['nom_employe', 'date', 'plaque', 'cout']]
+
+    # Les autres jours, un camion compatible que personne n'a conduit ce jour-là
+    occupes = pd.MultiIndex.from_frame(sur_principal[['date', 'plaque']])
+    expliques = pd.MultiIndex.from_frame(sur_principal[['nom_employe', 'date']])
+    candidats = compatibles[
+        ~pd.MultiIndex.from_frame(compatibles[['date', 'plaque']]).isin(occupes)
+        & ~pd.MultiIndex.from_frame(compatibles[['nom_employe', 'date']]).isin(expliques)
+    ]
+    changements = []
+    for date, du_jour in candidats.groupby('date', sort=True):
+        matrice = du_jour.pivot(index='nom_employe', columns='plaque', values='cout')
+        for l, c in _affecter(matrice.fillna(np.inf).to_numpy(dtype=float), seuil):
+            changements.append((matrice.index[l], date, matrice.columns[c], matrice.iat[l, c]))
+    if changements:
+        planning = pd.concat(
+            [planning, pd.DataFrame(changements, columns=['nom_employe', 'date', 'plaque', 'cout'])],
+            ignore_index=True,
+        )
+    planning = planning.rename(columns={'plaque': 'plaque_camion', 'cout': 'cout_minutes'})
+    if planning.empty:
+        return affectations, planning_vide
+    planning['changement'] = planning['plaque_camion'] != planning['nom_employe'].map(affectations)
+    return affectations, planning.sort_values(['nom_employe', 'date'], ignore_index=True)
@@ -0,0 +1,284 @@
+# analyse_cli.py
+
+"""
+Analyse pointage/GPS en ligne de commande, sans interface graphique (PyQt6 n'est
+jamais importé). Prévu pour des traitements planifiés, par exemple chaque nuit.
+
+Un seul lot :
+    python analyse_cli.py --pointage DOSSIER --gps DOSSIER --affectations FICHIER --sortie DOSSIER
+
+Plusieurs mois en parallèle (chaque dossier contient des sous-dossiers pointage/ et gps/) :
+    python analyse_cli.py --mois 2024-01 2024-02 2024-03 --affectations FICHIER --sortie DOSSIER --paralleles 3
+
+Le fichier d'affectations est un CSV "employe;plaque" (séparateur ; ou ,) ou un JSON
+{"Prénom Nom": "AB 123 CD"}. Avec --affectations auto, les associations sont proposées
+d'après la concordance des horaires (affectation_camions) et écrites dans
+affectations.csv, avec le planning des journées passées sur un autre camion
+(planning_camions.csv). Un planning peut aussi être fourni avec --planning, CSV
+"employe;date;plaque" (date AAAA-MM-JJ) prioritaire sur les affectations pour ces
+journées. Pour chaque lot sont écrits resultats.csv (un employé-jour
+par ligne), resume_semaine.csv et resume_mois.csv (moyenne, total et nombre de jours
+par employé et par période, voir resume_ecart.generer_resumes), avec les durées en minutes.
+Avec --format xlsx, ces trois tables sont les feuilles d'un seul resultats.xlsx ; avec
+--format parquet, les mêmes fichiers sont écrits en .parquet (voir export_resultats).
+Avec --mesures FICHIER, le temps passé par étape est écrit en JSON (voir instrumentation),
+avec le profil cProfile de chaque étape si --profilage est indiqué.
+
+Les horaires GPS du matin et du soir suivent les règles de dépôt par défaut
+(regles_depot.REGLES_DEFAUT) ou celles du fichier JSON indiqué par --regles-depot,
+par exemple pour plusieurs dépôts.
+
+Avec --historique FICHIER, les employé-jours analysés sont aussi enregistrés dans
+cette base SQLite (voir historique), qui garde les mois précédents. Sans --pointage
+ni --mois, les résultats et résumés sont écrits depuis la base, sans relire de
+classeur, pour la période --du/--au :
+    python analyse_cli.py --historique historique.sqlite --du 2024-01-01 --au 2024-06-30 --sortie DOSSIER
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import affectation_camions
+import analyse_core
+import export_resultats
+import resume_ecart
+from cache_lecture import CacheLecture
+from historique import HistoriqueAnalyses
+from regles_depot import ReglesDepot
+from instrumentation import mesures
+
+EXTENSIONS_POINTAGE = ('.xlsx', '.xls', '.csv')
+EXTENSIONS_GPS = ('.xlsx', '.xls')
+
+
+def lister_fichiers(dossier, extensions):
+    if not os.path.isdir(dossier):
+        raise ValueError(f"Dossier introuvable : {dossier}")
+    return sorted(
+        os.path.join(dossier, nom) for nom in os.listdir(dossier)
+        if nom.lower().endswith(extensions) and not nom.startswith('~$')
+    )
+
+
+def charger_affectations(chemin):
+    """Lit le fichier employé -> plaque (CSV ou JSON) et retourne un dictionnaire (jamais vide)."""
+    if chemin.lower().endswith('.json'):
+        with open(chemin, encoding='utf-8') as f:
+            try:
+                contenu = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Affectations {chemin} : JSON invalide ({e})") from e
+        if not isinstance(contenu, dict) or not contenu:
+            raise ValueError(f"Affectations {chemin} : un objet JSON {{\"employé\": \"plaque\"}} non vide est attendu")
+        return {str(nom).strip(): str(plaque).strip() for nom, plaque in contenu.items()}
+    with open(chemin, encoding='utf-8-sig', newline='') as f:
+        lignes = [ligne for ligne in f.read().splitlines() if ligne.strip()]
+    if not lignes:
+        raise ValueError(f"Fichier d'affectations vide : {chemin}")
+    try:
+        dialecte = csv.Sniffer().sniff(lignes[0], delimiters=';,')
+    except csv.Error as e:
+        raise ValueError(f"Affectations {chemin} : deux colonnes employé;plaque séparées par ';' ou ',' "
+                         f"sont attendues") from e
+    affectations = {}
+    for ligne in csv.reader(lignes, dialecte):
+        if len(ligne) < 2 or not ligne[0].strip():
+            continue
+        nom, plaque = ligne[0].strip(), ligne[1].strip()
+        if nom.lower() in ('employe', 'employé', 'nom_employe'):
+            continue
+        affectations[nom] = plaque
+    if not affectations:
+        raise ValueError(f"Aucune affectation employé;plaque dans {chemin}")
+    return affectations
+
+
+def charger_planning(chemin):
+    """Lit un planning journalier employé/date/plaque et le met au format attendu par analyser_lot."""
+    planning = pd.read_csv(chemin, sep=None, engine='python', encoding='utf-8-sig', dtype=str)
+    planning.columns = [str(col).strip().lower() for col in planning.columns]
+    planning = planning.rename(columns={'employe': 'nom_employe', 'employé': 'nom_employe', 'plaque': 'plaque_camion'})
+    manquantes = {'nom_employe', 'date', 'plaque_camion'} - set(planning.columns)
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes dans le planning {chemin} : {', '.join(sorted(manquantes))}")
+    planning['nom_employe'] = planning['nom_employe'].str.strip()
+    planning['plaque_camion'] = planning['plaque_camion'].str.strip()
+    planning['date'] = pd.to_datetime(planning['date'].str.strip(), format='%Y-%m-%d')
+    return planning[['nom_employe', 'date', 'plaque_camion']]
+
+
+def analyser_dossiers(dossier_pointage, dossier_gps, affectations, dossier_sortie,
+                      nb_processus=1, flux=False, cache=True, planning=None, format_sortie='.csv',
+                      lecteur_gps=None, historique=None, regles=None):
+    """
+    Charge, analyse et écrit les résultats d'un lot. Retourne le nombre d'employé-jours analysés.
+    affectations=None : associations et planning proposés automatiquement.
+    historique : chemin d'une base où enregistrer aussi les employé-jours analysés.
+    regles : regles_depot.ReglesDepot des horaires GPS (règles par défaut si None).
+    """
+    cache_lecture = CacheLecture(actif=cache)
+    fichiers_pointage = lister_fichiers(dossier_pointage, EXTENSIONS_POINTAGE)
+    fichiers_gps = lister_fichiers(dossier_gps, EXTENSIONS_GPS)
+
+    if flux:
+        donnees_employes = analyse_core.charger_pointage_flux(fichiers_pointage)
+    else:
+        donnees_employes = analyse_core.charger_fichier_pointage(
+            fichiers_pointage, nb_processus=nb_processus, cache=cache_lecture)
+    donnees_gps = analyse_core.TrajetsGPS(
+        analyse_core.charger_fichiers_gps(fichiers_gps, nb_processus=nb_processus, cache=cache_lecture,
+                                          lecteur=lecteur_gps))
+    if regles is not None:
+        for depot, plaque in regles.plaques_inconnues(donnees_gps.plaques()):
+            print(f"Attention : le camion {plaque} du dépôt {depot} n'a pas de données GPS dans {dossier_gps}",
+                  file=sys.stderr)
+    if not donnees_employes:
+        raise ValueError(f"Aucun pointage valide dans {dossier_pointage}")
+
+    df_pointage = pd.concat(list(donnees_employes.values()), ignore_index=True)
+    os.makedirs(dossier_sortie, exist_ok=True)
+    if affectations is None:
+        affectations, planning = affectation_camions.proposer_affectations(df_pointage, donnees_gps, regles)
+        pd.DataFrame(sorted(affectations.items()), columns=['employe', 'plaque']).to_csv(
+            os.path.join(dossier_sortie, 'affectations.csv'), sep=';', index=False)
+        planning.to_csv(os.path.join(dossier_sortie, 'planning_camions.csv'), sep=';', index=False)
+        planning = planning[planning['changement']]
+    df_resultats = analyse_core.analyser_lot(df_pointage, donnees_gps, affectations, planning, regles)
+    if historique:
+        HistoriqueAnalyses(historique).enregistrer(df_resultats)
+
+    resumes = resume_ecart.generer_resumes(df_resultats)
+    export_resultats.exporter_dossier(dossier_sortie, df_resultats, resumes, format_sortie)
+    return len(df_resultats)
+
+
+def resumer_historique(historique, dossier_sortie, debut=None, fin=None, format_sortie='.csv'):
+    """Écrit les résultats et résumés enregistrés dans l'historique pour la période ; retourne le nombre d'employé-jours."""
+    if not os.path.exists(historique):
+        raise ValueError(f"Historique introuvable : {historique}")
+    df_resultats = HistoriqueAnalyses(historique).lire(debut, fin)
+    resumes = resume_ecart.generer_resumes(df_resultats)
+    export_resultats.exporter_dossier(dossier_sortie, df_resultats, resumes, format_sortie)
+    return len(df_resultats)
+
+
+def _analyser_mois(tache):
+    (dossier_mois, affectations, dossier_sortie, flux, cache, planning, format_sortie, profilage, lecteur_gps,
+     historique, regles) = tache
+    # Chaque mois a ses propres mesures, renvoyées au processus principal
+    mesures.profilage = profilage
+    mesures.vider(dossier_mois)
+    nb_jours = analyser_dossiers(
+        os.path.join(dossier_mois, 'pointage'), os.path.join(dossier_mois, 'gps'), affectations,
+        os.path.join(dossier_sortie, os.path.basename(os.path.normpath(dossier_mois))),
+        flux=flux, cache=cache, planning=planning, format_sortie=format_sortie, lecteur_gps=lecteur_gps,
+        historique=historique, regles=regles)
+    mesures.terminer()
+    return dossier_mois, nb_jours, mesures.duree, mesures.rapport()
+
+
+def _date_iso(texte):
+    try:
+        return datetime.date.fromisoformat(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date invalide : {texte} (format attendu AAAA-MM-JJ)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pointage', help="dossier des fichiers de pointage")
+    parser.add_argument('--gps', help="dossier des fichiers GPS")
+    parser.add_argument('--mois', nargs='+', metavar='DOSSIER',
+                        help="dossiers de mois contenant chacun pointage/ et gps/")
+    parser.add_argument('--affectations',
+                        help="fichier employé -> plaque (CSV ou JSON), ou 'auto' pour les proposer")
+    parser.add_argument('--planning', help="planning journalier employé/date/plaque (CSV), prioritaire sur les affectations")
+    parser.add_argument('--sortie', required=True, help="dossier où écrire les résultats")
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'parquet'], default='csv',
+                        help="format des fichiers écrits (défaut : csv ; xlsx = un classeur à plusieurs feuilles)")
+    parser.add_argument('--processus', type=int, default=1,
+                        help="processus de lecture Excel pour un lot unique (défaut : 1)")
+    parser.add_argument('--paralleles', type=int, default=1,
+                        help="nombre de mois analysés en parallèle avec --mois (défaut : 1)")
+    parser.add_argument('--flux', action='store_true',
+                        help="lecture des pointages par blocs, pour de longs historiques")
+    parser.add_argument('--sans-cache', action='store_true', help="ignore le cache de lecture")
+    parser.add_argument('--lecteur-gps', choices=sorted(analyse_core.LECTEURS_GPS),
+                        help="lecteur des classeurs GPS (défaut : calamine s'il est installé, sinon flux)")
+    parser.add_argument('--mesures', metavar='FICHIER',
+                        help="écrit le temps passé par étape (lecture, analyse, résumés, export) en JSON")
+    parser.add_argument('--profilage', action='store_true',
+                        help="ajoute aux mesures le profil cProfile de chaque étape")
+    parser.add_argument('--regles-depot', metavar='FICHIER',
+                        help="règles de dépôt (JSON, voir regles_depot) pour les horaires GPS du matin et du soir")
+    parser.add_argument('--historique', metavar='FICHIER',
+                        help="base SQLite où enregistrer les employé-jours analysés (ou à résumer, sans --pointage ni --mois)")
+    parser.add_argument('--du', type=_date_iso, metavar='AAAA-MM-JJ', help="début de la période lue dans l'historique")
+    parser.add_argument('--au', type=_date_iso, metavar='AAAA-MM-JJ', help="fin (incluse) de la période lue dans l'historique")
+    args = parser.parse_args(argv)
+
+    depuis_historique = args.historique and not (args.mois or args.pointage or args.gps)
+    if (args.du or args.au) and not depuis_historique:
+        parser.error("--du et --au ne s'utilisent qu'avec --historique, sans --pointage ni --mois")
+    if not depuis_historique:
+        if bool(args.mois) == bool(args.pointage or args.gps):
+            parser.error("indiquer soit --pointage et --gps, soit --mois")
+        if not args.mois and not (args.pointage and args.gps):
+            parser.error("--pointage et --gps doivent être indiqués ensemble")
+        if not args.affectations:
+            parser.error("--affectations est obligatoire pour analyser des fichiers")
+
+    try:
+        if depuis_historique:
+            mesures.vider(args.historique)
+            nb_jours = resumer_historique(args.historique, args.sortie, args.du, args.au, '.' + args.format)
+            mesures.terminer()
+            print(f"{nb_jours} employé-jours lus dans l'historique en {mesures.duree:.1f} s -> {args.sortie}")
+            if args.mesures:
+                mesures.ecrire_json(args.mesures)
+            return 0
+        affectations = None if args.affectations == 'auto' else charger_affectations(args.affectations)
+        planning = charger_planning(args.planning) if args.planning else None
+        regles = ReglesDepot.depuis_json(args.regles_depot) if args.regles_depot else None
+        if not args.mois:
+            mesures.profilage = args.profilage
+            mesures.vider(args.pointage)
+            nb_jours = analyser_dossiers(args.pointage, args.gps, affectations, args.sortie,
+                                         nb_processus=args.processus, flux=args.flux, cache=not args.sans_cache,
+                                         planning=planning, format_sortie='.' + args.format,
+                                         lecteur_gps=args.lecteur_gps, historique=args.historique, regles=regles)
+            mesures.terminer()
+            print(f"{nb_jours} employé-jours analysés en {mesures.duree:.1f} s -> {args.sortie}")
+            if args.mesures:
+                print(f"  {mesures.texte()}")
+                mesures.ecrire_json(args.mesures)
+            return 0
+
+        taches = [(dossier, affectations, args.sortie, args.flux, not args.sans_cache, planning, '.' + args.format,
+                   args.profilage, args.lecteur_gps, args.historique, regles)
+                  for dossier in args.mois]
+        if args.paralleles > 1 and len(taches) > 1:
+            with ProcessPoolExecutor(max_workers=min(args.paralleles, len(taches))) as executor:
+                bilans = list(executor.map(_analyser_mois, taches))
+        else:
+            bilans = [_analyser_mois(tache) for tache in taches]
+        for dossier, nb_jours, duree, _ in bilans:
+            print(f"{dossier} : {nb_jours} employé-jours analysés en {duree:.1f} s")
+        if args.mesures:
+            with open(args.mesures, 'w', encoding='utf-8') as f:
+                json.dump({'lots': [rapport for *_, rapport in bilans]}, f, ensure_ascii=False, indent=2)
+        return 0
+    except Exception as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,166 @@
 # analyse_core.py
 
+import numpy as np
 import pandas as pd
 import datetime
+import hashlib
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
-# La fonction charger_fichier_pointage reste inchangée
-def charger_fichier_pointage(file_paths):
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+
+from instrumentation import mesure
+from regles_depot import REGLES_DEFAUT
+
+def _executer(fonction, arguments, nb_processus=1, progression=None):
     """
-    Charge un ou plusieurs fichiers de pointage, les concatène,
-    et retourne un dictionnaire de DataFrames, un par employé.
+    Applique `fonction` à chaque élément de `arguments`.
+    Avec nb_processus > 1 les appels sont répartis dans un ProcessPoolExecutor ;
+    dans tous les cas les résultats sont renvoyés dans l'ordre des arguments,
+    ce qui garantit la même fusion que le chargement séquentiel.
+    `progression(fait, total)` est appelée après chaque résultat ; une exception
+    levée par ce rappel (annulation) interrompt le traitement.
+    """
+    total = len(arguments)
+    resultats = []
+    if nb_processus and nb_processus > 1 and total > 1:
+        executor = ProcessPoolExecutor(max_workers=min(nb_processus, total))
+        try:
+            futures = [executor.submit(fonction, argument) for argument in arguments]
+            for future in futures:
+                resultats.append(future.result())
+                if progression:
+                    progression(len(resultats), total)
+        finally:
+            # En cas d'erreur ou d'annulation, les tâches pas encore démarrées sont abandonnées
+            executor.shutdown(wait=True, cancel_futures=True)
+        return resultats
+    for argument in arguments:
+        resultats.append(fonction(argument))
+        if progression:
+            progression(len(resultats), total)
+    return resultats
+
+def _lire_depuis_cache(cache, file_paths, type_lecture):
+    """
+    Interroge le cache (cache_lecture.CacheLecture) pour chaque fichier.
+    Retourne (objets, cles) : objets[i] vaut None si le fichier doit être relu.
     """
-    all_dfs = []
+    if cache is None or not cache.actif:
+        return [None] * len(file_paths), [None] * len(file_paths)
+    objets, cles = [], []
     for file_path in file_paths:
         try:
+            cle = cache.cle(file_path, type_lecture)
+        except OSError:
+            # Fichier introuvable : la lecture normale remontera l'erreur
+            cle = None
+        cles.append(cle)
+        objets.append(cache.lire(cle) if cle else None)
+    return objets, cles
+
+COLONNES_POINTAGE = ['Nom', 'Prénom', 'Entrée', 'Sortie', 'Type']
+TAILLE_BLOC_POINTAGE = 20000
+
+# Types compacts des données chargées et des résultats : les textes répétés sur
+# chaque ligne (noms, types de pointage, plaques) sont stockés en catégories.
+SCHEMA_POINTAGE = {
+    'Nom': 'category', 'Prénom': 'category', 'nom_complet': 'category', 'Type': 'category',
+    'Entrée': 'datetime64[ns]', 'Sortie': 'datetime64[ns]',
+}
+SCHEMA_RESULTATS = {
+    'date': 'datetime64[ns]', 'nom_employe': 'category', 'plaque_camion': 'category',
+    'pointage_debut': 'datetime64[ns]', 'pointage_fin': 'datetime64[ns]',
+    'temps_travail': 'timedelta64[ns]', 'temps_pause': 'timedelta64[ns]',
+    'gps_arrivee': 'datetime64[ns]', 'gps_depart': 'datetime64[ns]',
+    'ecart_matin': 'timedelta64[ns]', 'ecart_soir': 'timedelta64[ns]',
+}
+
+def appliquer_schema(df, schema):
+    """Convertit en place les colonnes de df présentes dans le schéma et retourne df."""
+    for colonne, dtype in schema.items():
+        if colonne in df.columns and df[colonne].dtype != dtype:
+            df[colonne] = df[colonne].astype(dtype)
+    return df
+
+def _unifier_categories(frames, schema):
+    """Donne les mêmes catégories (triées) à chaque DataFrame, pour que leur concaténation reste catégorielle."""
+    for colonne, dtype in schema.items():
+        if dtype != 'category':
+            continue
+        series = [df[colonne] for df in frames if colonne in df.columns]
+        if not series:
+            continue
+        categories = pd.Index(np.concatenate([s.cat.categories.to_numpy() for s in series])).unique().sort_values()
+        for df in frames:
+            if colonne in df.columns:
+                df[colonne] = df[colonne].cat.set_categories(categories)
+
+def _normaliser_pointage(df):
+    """
+    Nettoie les noms, construit nom_complet et convertit les horodatages ;
+    les lignes sans nom ou sans horaires valides sont supprimées. Modifie df en place.
+    """
+    df.dropna(subset=['Nom', 'Prénom'], inplace=True)
+    df['Nom'] = df['Nom'].astype(str).str.strip()
+    df['Prénom'] = df['Prénom'].astype(str).str.strip()
+    df['nom_complet'] = df['Prénom'] + ' ' + df['Nom']
+
+    df['Entrée'] = pd.to_datetime(df['Entrée'], dayfirst=True, errors='coerce')
+    df['Sortie'] = pd.to_datetime(df['Sortie'], dayfirst=True, errors='coerce')
+    df.dropna(subset=['Entrée', 'Sortie'], inplace=True)
+    return df
+
+def _lire_fichier_pointage(file_path, separateur_csv=';'):
+    try:
+        # Exports CSV : même disposition que les classeurs (en-tête sur la 2e ligne), comme dans _blocs_pointage
+        if os.path.splitext(file_path)[1].lower() == '.csv':
+            df = pd.read_csv(file_path, sep=separateur_csv, header=1)
+        else:
             df = pd.read_excel(file_path, sheet_name=0, header=1)
-            if not df.empty:
-                df.columns = df.columns.str.strip()
-                all_dfs.append(df)
-        except Exception as e:
-            raise ValueError(f"Erreur lors de la lecture du fichier {file_path}. Assurez-vous que le format est correct. Détail: {e}")
+        if not df.empty:
+            df.columns = df.columns.str.strip()
+        return df
+    except Exception as e:
+        raise ValueError(f"Erreur lors de la lecture du fichier {file_path}. Assurez-vous que le format est correct. Détail: {e}")
+
+def _progression_fichiers(progression, deja_faits, total, libelles):
+    """Adapte un rappel progression(fait, total, fichier) au rappel de _executer."""
+    if progression is None:
+        return None
+    progression(deja_faits, total, "")
+    return lambda fait, _: progression(deja_faits + fait, total, os.path.basename(libelles[fait - 1]))
+
+def _nb_pointages(employes_data):
+    return sum(len(df) for df in employes_data.values())
+
+def _nb_trajets(donnees_gps):
+    return sum(len(trajets) for jours in donnees_gps.values() for trajets in jours.values())
+
+@mesure("Lecture pointage", _nb_pointages)
+def charger_fichier_pointage(file_paths, nb_processus=1, cache=None, progression=None):
+    """
+    Charge un ou plusieurs fichiers de pointage, les concatène,
+    et retourne un dictionnaire de DataFrames, un par employé.
+    Avec nb_processus > 1, les classeurs sont lus en parallèle.
+    Si un cache (cache_lecture.CacheLecture) est fourni, les fichiers inchangés
+    depuis leur dernière lecture n'ont pas à être relus.
+    `progression(fait, total, fichier)` est appelée après chaque fichier lu.
+    """
+    file_paths = list(file_paths)
+    dfs, cles = _lire_depuis_cache(cache, file_paths, 'pointage')
+    manquants = [i for i, df in enumerate(dfs) if df is None]
+    a_lire = [file_paths[i] for i in manquants]
+    lus = _executer(_lire_fichier_pointage, a_lire, nb_processus,
+                    _progression_fichiers(progression, len(file_paths) - len(a_lire), len(file_paths), a_lire))
+    for i, df in zip(manquants, lus):
+        dfs[i] = df
+        if cles[i] is not None:
+            cache.ecrire(cles[i], df)
+
+    all_dfs = [df for df in dfs if not df.empty]
 
     if not all_dfs:
         return {}
@@ -28,127 +170,630 @@ def charger_fichier_pointage(file_paths):
     if 'Nom' not in combined_df.columns or 'Prénom' not in combined_df.columns:
         raise ValueError("Les colonnes 'Nom' et 'Prénom' sont introuvables dans les fichiers de pointage. Veuillez vérifier l'en-tête.")
 
-    combined_df.dropna(subset=['Nom', 'Prénom'], inplace=True)
-    combined_df['Nom'] = combined_df['Nom'].astype(str).str.strip()
-    combined_df['Prénom'] = combined_df['Prénom'].astype(str).str.strip()
-    combined_df['nom_complet'] = combined_df['Prénom'] + ' ' + combined_df['Nom']
+    _normaliser_pointage(combined_df)
+    appliquer_schema(combined_df, SCHEMA_POINTAGE)
+
+    employes_data = {name: group.copy() for name, group in combined_df.groupby('nom_complet', observed=True)}
+    return employes_data
+
+def _blocs_pointage(file_path, taille_bloc, separateur_csv):
+    """
+    Lit un fichier de pointage par blocs de `taille_bloc` lignes (en-tête sur la 2e ligne).
+    Les .xlsx sont parcourus avec openpyxl en lecture seule, les .csv avec read_csv(chunksize) ;
+    les autres formats (.xls) ne se lisent pas en flux et sont renvoyés en un seul bloc.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        for bloc in pd.read_csv(file_path, sep=separateur_csv, header=1, chunksize=taille_bloc):
+            bloc.columns = bloc.columns.str.strip()
+            yield bloc
+        return
+    if extension not in ('.xlsx', '.xlsm'):
+        yield _lire_fichier_pointage(file_path)
+        return
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        # Les exports ont parfois des dimensions erronées dans leurs métadonnées
+        ws.reset_dimensions()
+        lignes = ws.iter_rows(values_only=True)
+        next(lignes, None)
+        en_tete = next(lignes, None)
+        if en_tete is None:
+            return
+        colonnes = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(en_tete)]
+        largeur = len(colonnes)
+        while True:
+            bloc = list(islice(lignes, taille_bloc))
+            if not bloc:
+                break
+            bloc = [tuple(ligne[:largeur]) + (None,) * (largeur - len(ligne)) for ligne in bloc]
+            yield pd.DataFrame.from_records(bloc, columns=colonnes)
+    finally:
+        wb.close()
 
-    combined_df['Entrée'] = pd.to_datetime(combined_df['Entrée'], dayfirst=True, errors='coerce')
-    combined_df['Sortie'] = pd.to_datetime(combined_df['Sortie'], dayfirst=True, errors='coerce')
-    combined_df.dropna(subset=['Entrée', 'Sortie'], inplace=True)
+@mesure("Lecture pointage (flux)", _nb_pointages)
+def charger_pointage_flux(file_paths, taille_bloc=TAILLE_BLOC_POINTAGE, separateur_csv=';', progression=None):
+    """
+    Variante de charger_fichier_pointage pour de longs historiques : les fichiers sont
+    lus par blocs, chaque bloc est normalisé, converti au schéma compact (SCHEMA_POINTAGE)
+    puis réparti par employé en ne gardant que les colonnes utiles (COLONNES_POINTAGE +
+    nom_complet). Aucun DataFrame combiné de tous les fichiers n'est construit, et les
+    morceaux conservés jusqu'à l'assemblage final sont déjà en catégories.
+    Retourne le même dictionnaire {nom_complet: DataFrame} que charger_fichier_pointage.
+    """
+    file_paths = list(file_paths)
+    morceaux_par_employe = {}
+    for i, file_path in enumerate(file_paths):
+        blocs = _blocs_pointage(file_path, taille_bloc, separateur_csv)
+        while True:
+            try:
+                bloc = next(blocs, None)
+            except ValueError:
+                raise
+            except Exception as e:
+                raise ValueError(f"Erreur lors de la lecture du fichier {file_path}. Assurez-vous que le format est correct. Détail: {e}")
+            if bloc is None:
+                break
+            if bloc.empty:
+                continue
+            if 'Nom' not in bloc.columns or 'Prénom' not in bloc.columns:
+                raise ValueError("Les colonnes 'Nom' et 'Prénom' sont introuvables dans les fichiers de pointage. Veuillez vérifier l'en-tête.")
+            bloc = _normaliser_pointage(bloc[[c for c in COLONNES_POINTAGE if c in bloc.columns]].copy())
+            # Conversion une fois par bloc : les morceaux gardés en mémoire ne contiennent pas de textes répétés
+            appliquer_schema(bloc, SCHEMA_POINTAGE)
+            for nom, groupe in bloc.groupby('nom_complet', sort=False, observed=True):
+                morceaux_par_employe.setdefault(nom, []).append(groupe)
+        if progression:
+            progression(i + 1, len(file_paths), os.path.basename(file_path))
 
-    employes_data = {name: group.copy() for name, group in combined_df.groupby('nom_complet')}
+    # Un seul assemblage par employé ; les morceaux sont libérés au fur et à mesure
+    employes_data = {}
+    for nom in sorted(morceaux_par_employe):
+        morceaux = morceaux_par_employe.pop(nom)
+        # Catégories différentes d'un bloc à l'autre : unifiées pour que la concaténation reste catégorielle
+        _unifier_categories(morceaux, SCHEMA_POINTAGE)
+        employes_data[nom] = appliquer_schema(pd.concat(morceaux, ignore_index=True), SCHEMA_POINTAGE)
+    _unifier_categories(list(employes_data.values()), SCHEMA_POINTAGE)
     return employes_data
 
+COLONNES_TRAJETS = ['heure_depart', 'heure_arrivee', 'lieu_arrivee']
+
+def heures_vers_timedelta(valeurs):
+    """
+    Convertit des heures lues dans Excel (datetime.time ou datetime) en décalages
+    depuis minuit (timedelta64), sans passer par du texte. Les autres valeurs donnent NaT.
+    """
+    secondes = np.fromiter(
+        (h.hour * 3600 + h.minute * 60 + h.second if isinstance(h, (datetime.time, datetime.datetime)) else np.nan
+         for h in valeurs),
+        dtype=float, count=len(valeurs))
+    return pd.to_timedelta(secondes, unit='s')
+
+def _trajets_vides():
+    return pd.DataFrame({
+        'heure_depart': pd.Series(dtype='timedelta64[ns]'),
+        'heure_arrivee': pd.Series(dtype='timedelta64[ns]'),
+        'lieu_arrivee': pd.Series(dtype=object),
+    })
+
+def extraire_trajets(df_jour):
+    """
+    Extrait le bloc de trajets d'une feuille journalière GPS (lue avec header=None).
+    L'en-tête "Trajet n°" est repéré par un masque booléen sur la colonne B, puis
+    le bloc est découpé d'un seul tenant jusqu'à la première ligne sans numéro.
+    Retourne un DataFrame (heure_depart, heure_arrivee, lieu_arrivee), vide si
+    aucun trajet n'est trouvé ; les heures sont des décalages depuis minuit (timedelta64).
+    """
+    return _trajets_depuis_valeurs(df_jour.to_numpy(dtype=object))
+
+def _trajets_depuis_valeurs(valeurs):
+    """extraire_trajets sur le tableau (object) des cellules de la feuille."""
+    if valeurs.ndim != 2 or valeurs.shape[1] < 6:
+        return _trajets_vides()
+
+    valeurs = valeurs[:, :6]
+    # Test cellule par cellule : la colonne B peut n'avoir aucun texte (journée sans trajet)
+    est_entete = np.fromiter((isinstance(v, str) and v.strip().startswith("Trajet n") for v in valeurs[:, 1]),
+                             bool, len(valeurs))
+    if not est_entete.any():
+        return _trajets_vides()
+
+    # Le bloc commence sous l'en-tête et s'arrête à la première ligne dont la colonne B est vide
+    bloc = valeurs[int(est_entete.argmax()) + 1:]
+    vides = pd.isna(bloc[:, 1])
+    if vides.any():
+        bloc = bloc[:int(vides.argmax())]
+    bloc = bloc[~pd.isna(bloc[:, 3])]
+
+    return pd.DataFrame({
+        'heure_depart': heures_vers_timedelta(bloc[:, 3]),
+        'heure_arrivee': heures_vers_timedelta(bloc[:, 5]),
+        'lieu_arrivee': bloc[:, 4].astype(str),
+    })
+
+def _plaque_depuis_nom(file_path):
+    """Extrait la plaque du nom de fichier ("... véhicule AB-123-CD ..."), None si absente."""
+    try:
+        filename = os.path.basename(file_path)
+        parts = filename.replace('_', ' ').replace('-', ' ').split()
+        idx = [p.lower() for p in parts].index("véhicule")
+        return " ".join(parts[idx+1:idx+4])
+    except (ValueError, IndexError):
+        return None
+
+FEUILLES_JOURS_GPS = (1, 6)
+
+# --- Lecteurs des feuilles GPS ---
+# Chaque lecteur renvoie les feuilles [debut, fin[ d'un classeur sous forme de tableaux
+# numpy de cellules (object), avec les mêmes valeurs que pd.read_excel(header=None) ;
+# la date en B5 et le bloc de trajets (_trajets_depuis_valeurs) en sont tirés ensuite.
+# 'pandas' est le lecteur d'origine et sert de repli ; 'flux' parcourt les lignes avec
+# openpyxl en lecture seule et s'arrête après le bloc de trajets ; 'calamine' lit le
+# classeur avec python-calamine (moteur Rust, optionnel) s'il est installé.
+# Le gain de 'flux' reste modeste (de x1,0 à x1,4 selon les mesures de
+# benchmarks/bench_lecteurs_gps, avec 12 à 60 trajets par jour) ; l'égalité des
+# lecteurs est vérifiée par tests/test_lecteurs_gps.py.
+
+# Textes lus comme valeurs manquantes par pd.read_excel (na_values par défaut)
+TEXTES_MANQUANTS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+def _feuilles_gps_pandas(file_path, debut, fin):
+    xls = pd.ExcelFile(file_path)
+    for sheet_name in xls.sheet_names[debut:fin]:
+        yield pd.read_excel(xls, sheet_name=sheet_name, header=None).to_numpy(dtype=object)
+
+def _cellule_openpyxl(valeur):
+    """Cellule lue par openpyxl, convertie comme le fait pandas (nombres entiers -> int, erreurs -> NaN)."""
+    if valeur is None:
+        return ""
+    if isinstance(valeur, float):
+        return int(valeur) if valeur.is_integer() else valeur
+    if isinstance(valeur, str) and valeur in ERROR_CODES:
+        return np.nan
+    return valeur
+
+def _cellule_calamine(valeur):
+    """Cellule lue par python-calamine, convertie comme le fait pandas."""
+    if isinstance(valeur, float):
+        return int(valeur) if valeur.is_integer() else valeur
+    if isinstance(valeur, datetime.date):
+        return pd.Timestamp(valeur)
+    if isinstance(valeur, datetime.timedelta):
+        return pd.Timedelta(valeur)
+    return valeur
+
+def _lignes_jour_gps(lignes, convertir):
+    """
+    Lignes converties d'une feuille journalière jusqu'à la fin du bloc de trajets : la
+    lecture s'arrête à la première ligne dont la colonne B est vide après l'en-tête
+    "Trajet n°", comme extraire_trajets, ce qui évite les totaux et le reste de la feuille.
+    """
+    dans_bloc = False
+    for ligne in lignes:
+        ligne = [convertir(valeur) for valeur in ligne]
+        colonne_b = ligne[1] if len(ligne) > 1 else ""
+        if dans_bloc and (colonne_b in TEXTES_MANQUANTS if isinstance(colonne_b, str) else pd.isna(colonne_b)):
+            return
+        yield ligne
+        if isinstance(colonne_b, str) and colonne_b.strip().startswith("Trajet n"):
+            dans_bloc = True
+
+def _valeurs_jour_gps(lignes):
+    """
+    Tableau des cellules d'une feuille, mis en forme comme par pd.read_excel : cellules
+    vides de fin de ligne et lignes vides de fin de feuille retirées, largeur de la plus
+    longue ligne, textes manquants (TEXTES_MANQUANTS) remplacés par NaN.
+    """
+    donnees, derniere = [], -1
+    for i, ligne in enumerate(lignes):
+        while ligne and ligne[-1] == "":
+            ligne.pop()
+        if ligne:
+            derniere = i
+        donnees.append(ligne)
+    donnees = donnees[:derniere + 1]
+    largeur = max((len(ligne) for ligne in donnees), default=0)
+    valeurs = np.full((len(donnees), largeur), np.nan, dtype=object)
+    for i, ligne in enumerate(donnees):
+        for j, valeur in enumerate(ligne):
+            if not (isinstance(valeur, str) and valeur in TEXTES_MANQUANTS):
+                valeurs[i, j] = valeur
+    return valeurs
+
+def _feuilles_gps_flux(file_path, debut, fin):
+    wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        for nom in wb.sheetnames[debut:fin]:
+            ws = wb[nom]
+            # Les exports ont parfois des dimensions erronées dans leurs métadonnées
+            ws.reset_dimensions()
+            yield _valeurs_jour_gps(_lignes_jour_gps(ws.iter_rows(values_only=True), _cellule_openpyxl))
+    finally:
+        wb.close()
+
+def _feuilles_gps_calamine(file_path, debut, fin):
+    from python_calamine import load_workbook as load_workbook_calamine
+
+    wb = load_workbook_calamine(file_path)
+    try:
+        # Positions des feuilles comptées comme openpyxl, toutes feuilles confondues
+        for nom in [feuille.name for feuille in wb.sheets_metadata][debut:fin]:
+            lignes = wb.get_sheet_by_name(nom).to_python(skip_empty_area=False)
+            yield _valeurs_jour_gps(_lignes_jour_gps(lignes, _cellule_calamine))
+    finally:
+        if hasattr(wb, 'close'):
+            wb.close()
+
+def _calamine_disponible():
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+LECTEURS_GPS = {
+    'calamine': _feuilles_gps_calamine,
+    'flux': _feuilles_gps_flux,
+    'pandas': _feuilles_gps_pandas,
+}
+# Formats lus par openpyxl et calamine ; les autres (.xls) passent par le lecteur pandas
+EXTENSIONS_LECTEURS_RAPIDES = ('.xlsx', '.xlsm')
+
+def lecteur_gps_par_defaut():
+    """'calamine' si python-calamine est installé, sinon 'flux'."""
+    return 'calamine' if _calamine_disponible() else 'flux'
+
+def _lire_feuilles_gps(tache):
+    """
+    Lit les feuilles journalières d'un classeur GPS comprises entre les positions [debut, fin[.
+    `tache` est un tuple (file_path, debut, fin, lecteur) pour pouvoir être envoyé à un processus ;
+    lecteur est un nom de LECTEURS_GPS. Si un autre lecteur que 'pandas' échoue sur un classeur,
+    celui-ci est relu avec le lecteur 'pandas'.
+    Retourne une liste de (date_str, trajets_du_jour) dans l'ordre des feuilles.
+    """
+    file_path, debut, fin, lecteur = tache
+    if os.path.splitext(file_path)[1].lower() not in EXTENSIONS_LECTEURS_RAPIDES:
+        lecteur = 'pandas'
+    if lecteur != 'pandas':
+        try:
+            return _jours_gps(LECTEURS_GPS[lecteur](file_path, debut, fin))
+        except Exception:
+            pass
+    return _jours_gps(_feuilles_gps_pandas(file_path, debut, fin))
+
+def _jours_gps(feuilles):
+    jours = []
+    for valeurs in feuilles:
+        try:
+            date_cell_value = valeurs[4, 1]
+            if pd.isna(date_cell_value): continue
+            date_obj = pd.to_datetime(date_cell_value, dayfirst=True)
+            date_str = date_obj.strftime('%Y-%m-%d')
+        except Exception: continue
+
+        trajets_du_jour = _trajets_depuis_valeurs(valeurs)
+        if not trajets_du_jour.empty:
+            jours.append((date_str, trajets_du_jour))
+    return jours
+
+def _jours_vers_table(jours):
+    """Aplatit une liste de (date_str, trajets) en un seul DataFrame pour le cache."""
+    if not jours:
+        return _trajets_vides().assign(feuille=pd.Series(dtype='int64'), date=pd.Series(dtype=object))[['feuille', 'date'] + COLONNES_TRAJETS]
+    return pd.concat([trajets.assign(feuille=i, date=date_str) for i, (date_str, trajets) in enumerate(jours)],
+                     ignore_index=True)[['feuille', 'date'] + COLONNES_TRAJETS]
+
+def _table_vers_jours(table):
+    return [(groupe['date'].iloc[0], groupe[COLONNES_TRAJETS].reset_index(drop=True))
+            for _, groupe in table.groupby('feuille', sort=True)]
+
 # --- MODIFICATION MAJEURE DE CETTE FONCTION ---
-def charger_fichiers_gps(file_paths):
+@mesure("Lecture GPS", _nb_trajets)
+def charger_fichiers_gps(file_paths, nb_processus=1, cache=None, progression=None, lecteur=None):
     """
     Charge les fichiers GPS et retourne un dictionnaire de données GPS
     structuré par plaque d'immatriculation.
-    Exemple de retour: { "Plaque1": { "date1": [trajets] }, "Plaque2": { ... } }
+    Exemple de retour: { "Plaque1": { "date1": DataFrame de trajets }, "Plaque2": { ... } }
+    Avec nb_processus > 1, les classeurs sont lus dans des processus séparés, un par
+    classeur ; quand il y a moins de classeurs à lire que de processus, chaque feuille
+    journalière est une tâche, pour occuper tous les processus (mais chaque tâche rouvre
+    le classeur). La fusion se fait dans l'ordre fichier/feuille, comme en séquentiel.
+    Si un cache (cache_lecture.CacheLecture) est fourni, les fichiers inchangés ne sont pas relus.
+    `progression(fait, total, fichier)` est appelée après chaque fichier (ou feuille) lu.
+    `lecteur` choisit le lecteur des classeurs (voir LECTEURS_GPS), par défaut
+    lecteur_gps_par_defaut() ; tous donnent les mêmes trajets.
     """
+    if lecteur is None:
+        lecteur = lecteur_gps_par_defaut()
+    elif lecteur not in LECTEURS_GPS:
+        raise ValueError(f"Lecteur GPS inconnu : {lecteur} (lecteurs possibles : {', '.join(LECTEURS_GPS)})")
+    elif lecteur == 'calamine' and not _calamine_disponible():
+        # Sinon chaque classeur serait relu sans le dire par le lecteur 'pandas'
+        raise ValueError("Lecteur GPS calamine : python-calamine n'est pas installé")
     gps_data_by_plate = {}
 
+    fichiers = []
     for file_path in file_paths:
-        plaque = "Inconnue"
-        try:
-            filename = os.path.basename(file_path)
-            parts = filename.replace('_', ' ').replace('-', ' ').split()
-            idx = [p.lower() for p in parts].index("véhicule")
-            plaque = " ".join(parts[idx+1:idx+4])
-        except (ValueError, IndexError):
+        plaque = _plaque_depuis_nom(file_path)
+        if plaque is None:
             # Si la plaque n'est pas trouvée, on passe au fichier suivant pour ce camion
-            continue 
-        
+            continue
+        fichiers.append((file_path, plaque))
+
+    tables, cles = _lire_depuis_cache(cache, [file_path for file_path, _ in fichiers], 'gps')
+    jours_par_fichier = [None if table is None else _table_vers_jours(table) for table in tables]
+
+    taches, proprietaires = [], []
+    debut, fin = FEUILLES_JOURS_GPS
+    nb_a_lire = sum(jours is None for jours in jours_par_fichier)
+    # Découpage par feuille seulement si les classeurs ne suffisent pas à occuper les processus
+    par_feuille = bool(nb_processus) and nb_processus > 1 and nb_a_lire < nb_processus
+    for i, (file_path, _) in enumerate(fichiers):
+        if jours_par_fichier[i] is not None:
+            continue
+        jours_par_fichier[i] = []
+        if par_feuille:
+            # Une tâche par feuille journalière
+            taches.extend((file_path, j, j + 1, lecteur) for j in range(debut, fin))
+            proprietaires.extend([i] * (fin - debut))
+        else:
+            taches.append((file_path, debut, fin, lecteur))
+            proprietaires.append(i)
+
+    nb_en_cache = len(fichiers) - len(set(proprietaires))
+    rappel = _progression_fichiers(progression, nb_en_cache, nb_en_cache + len(taches), [tache[0] for tache in taches])
+    for i, jours in zip(proprietaires, _executer(_lire_feuilles_gps, taches, nb_processus, rappel)):
+        jours_par_fichier[i].extend(jours)
+    for i in sorted(set(proprietaires)):
+        if cles[i] is not None:
+            cache.ecrire(cles[i], _jours_vers_table(jours_par_fichier[i]))
+
+    for (_, plaque), jours in zip(fichiers, jours_par_fichier):
         # Si c'est la première fois qu'on voit cette plaque, on initialise son dictionnaire
         if plaque not in gps_data_by_plate:
             gps_data_by_plate[plaque] = {}
-
-        xls = pd.ExcelFile(file_path)
-        sheet_names_to_read = xls.sheet_names[1:6]
-        for sheet_name in sheet_names_to_read:
-            df_jour = pd.read_excel(xls, sheet_name=sheet_name, header=None)
-            try:
-                date_cell_value = df_jour.iloc[4, 1]
-                if pd.isna(date_cell_value): continue
-                date_obj = pd.to_datetime(date_cell_value, dayfirst=True)
-                date_str = date_obj.strftime('%Y-%m-%d')
-            except Exception: continue
-            
-            start_row_index = -1
-            for row in df_jour.itertuples():
-                if isinstance(row[2], str) and row[2].strip().startswith("Trajet n"):
-                    start_row_index = row.Index + 1; break
-            if start_row_index == -1: continue
-            
-            trajets_data = []
-            for _, row in df_jour.iloc[start_row_index:].iterrows():
-                if pd.notna(row[1]) and pd.notna(row[3]):
-                    trajets_data.append({
-                        'heure_depart': row[3], 
-                        'heure_arrivee': row[5],
-                        'lieu_arrivee': row[4]
-                    })
-                elif pd.isna(row[1]): break
-            
-            if trajets_data:
-                # On ajoute les données de la journée à la bonne plaque
-                gps_data_by_plate[plaque][date_str] = trajets_data
+        for date_str, trajets_du_jour in jours:
+            # On ajoute les données de la journée à la bonne plaque
+            gps_data_by_plate[plaque][date_str] = trajets_du_jour
 
     return gps_data_by_plate
 
-# La fonction analyser_donnees reste inchangée
-def analyser_donnees(df_pointage, donnees_gps, nom_employe, plaque_camion):
-    resultats_analyses = []
-    pointages_par_jour = df_pointage.groupby(df_pointage['Entrée'].dt.date)
-
-    for date_obj, group in pointages_par_jour:
-        date_str = date_obj.strftime('%Y-%m-%d')
-        travail = group[group['Type'] == 'travail']
-        pause = group[group['Type'] == 'pause']
-        if travail.empty: continue
-        
-        debut_journee = travail['Entrée'].min()
-        fin_journee = travail['Sortie'].max()
-
-        resultat_jour = {
-            'date': date_obj, 
-            'nom_employe': nom_employe,
-            'plaque_camion': plaque_camion,
-            'pointage_debut': debut_journee, 
-            'pointage_fin': fin_journee,
-            'temps_travail': (travail['Sortie'] - travail['Entrée']).sum(),
-            'temps_pause': (pause['Sortie'] - pause['Entrée']).sum() if not pause.empty else pd.Timedelta(0),
-            'gps_arrivee': pd.NaT, 'gps_depart': pd.NaT, 
-            'ecart_matin': pd.NaT, 'ecart_soir': pd.NaT
-        }
-
-        if date_str in donnees_gps:
-            trajets_du_jour = donnees_gps[date_str]
-            if not trajets_du_jour: 
-                resultats_analyses.append(resultat_jour)
+def fusionner_donnees_gps(donnees_gps, nouvelles):
+    """
+    Ajoute à donnees_gps les trajets de `nouvelles` (même structure {plaque: {date_str: trajets}})
+    sans modifier les dictionnaires d'entrée. Règle de recouvrement : une journée déjà présente
+    pour la même plaque est remplacée par celle du fichier ajouté, comme le fait
+    charger_fichiers_gps pour un fichier plus loin dans la liste.
+    """
+    fusion = dict(donnees_gps)
+    for plaque, jours in nouvelles.items():
+        fusion[plaque] = {**fusion.get(plaque, {}), **jours}
+    return fusion
+
+COLONNES_RESULTATS = [
+    'date', 'nom_employe', 'plaque_camion', 'pointage_debut', 'pointage_fin',
+    'temps_travail', 'temps_pause', 'gps_arrivee', 'gps_depart', 'ecart_matin', 'ecart_soir',
+]
+
+@mesure("Table des trajets GPS", len)
+def table_trajets(donnees_gps):
+    """
+    Aplatit {plaque: {date_str: trajets}} en une seule table de trajets
+    (plaque, date, ordre, depart, arrivee, lieu_arrivee) avec des datetimes complets,
+    obtenus en ajoutant la date du jour aux heures stockées en timedelta64.
+    """
+    cles, longueurs, departs, arrivees, lieux = [], [], [], [], []
+    for plaque, jours in donnees_gps.items():
+        for date_str, trajets in jours.items():
+            if trajets.empty:
                 continue
+            cles.append((plaque, date_str))
+            longueurs.append(len(trajets))
+            departs.append(trajets['heure_depart'].to_numpy())
+            arrivees.append(trajets['heure_arrivee'].to_numpy())
+            lieux.append(trajets['lieu_arrivee'].to_numpy())
+    if not cles:
+        return pd.DataFrame({
+            'plaque': pd.Series(dtype='category'), 'date': pd.Series(dtype='datetime64[ns]'),
+            'ordre': pd.Series(dtype='int64'), 'depart': pd.Series(dtype='datetime64[ns]'),
+            'arrivee': pd.Series(dtype='datetime64[ns]'), 'lieu_arrivee': pd.Series(dtype=object),
+        })
+
+    longueurs = np.array(longueurs)
+    plaques = pd.Categorical(np.repeat(np.array([plaque for plaque, _ in cles], dtype=object), longueurs))
+    dates = np.repeat(pd.to_datetime([date_str for _, date_str in cles], format='%Y-%m-%d').to_numpy(), longueurs)
+    # Rang du trajet dans sa journée
+    ordre = np.arange(longueurs.sum()) - np.repeat(np.cumsum(longueurs) - longueurs, longueurs)
+    return pd.DataFrame({
+        'plaque': plaques,
+        'date': dates,
+        'ordre': ordre,
+        'depart': dates + np.concatenate(departs).astype('timedelta64[ns]'),
+        'arrivee': dates + np.concatenate(arrivees).astype('timedelta64[ns]'),
+        'lieu_arrivee': np.concatenate(lieux).astype(str).astype(object),
+    })
+
+@mesure("Horaires GPS", len)
+def _horaires_gps(trajets, regles=None):
+    """
+    Pour chaque (plaque, date) : arrivée GPS du matin et départ GPS du soir selon
+    `regles` (regles_depot.ReglesDepot) ; par défaut, arrivée du premier trajet et
+    départ du dernier trajet valide vers le dépôt de Gardanne.
+    """
+    return (regles or REGLES_DEFAUT).horaires(trajets)
+
+class TrajetsGPS:
+    """
+    Trajets GPS de tous les camions dans une seule table triée, indexée par (plaque, date),
+    construite une fois à partir de {plaque: {date_str: trajets}} (charger_fichiers_gps).
+    Les recherches par plaque et par période se font par dichotomie sur l'index trié ;
+    les horaires matin/soir sont calculés au premier besoin puis conservés.
+    Peut remplacer le dictionnaire partout où analyse_core attend des données GPS.
+    """
+
+    def __init__(self, donnees_gps):
+        trajets = table_trajets(donnees_gps)
+        trajets['plaque'] = trajets['plaque'].astype(object)
+        # Tri stable : les trajets d'une journée gardent leur ordre
+        self.trajets = trajets.set_index(['plaque', 'date']).sort_index(kind='stable')
+        dates = self.trajets.index.get_level_values('date').to_numpy()
+        self._ordre_dates = np.argsort(dates, kind='stable')
+        self._dates_triees = dates[self._ordre_dates]
+        # Horaires déjà calculés, par règles de dépôt
+        self._horaires = {}
+
+    def __len__(self):
+        return len(self.trajets)
+
+    def plaques(self):
+        return self.trajets.index.get_level_values('plaque').unique().to_list()
+
+    def table(self):
+        """Table plate (plaque, date, ordre, depart, arrivee, lieu_arrivee), comme table_trajets."""
+        return self.trajets.reset_index()
+
+    def entre(self, debut, fin, plaque=None):
+        """Trajets des journées comprises entre debut et fin (incluses), pour un camion ou pour tous."""
+        debut, fin = pd.Timestamp(debut).normalize(), pd.Timestamp(fin).normalize()
+        if plaque is not None:
+            i, j = self.trajets.index.slice_locs((plaque, debut), (plaque, fin))
+            return self.trajets.iloc[i:j].reset_index()
+        i = np.searchsorted(self._dates_triees, debut.to_datetime64(), side='left')
+        j = np.searchsorted(self._dates_triees, fin.to_datetime64(), side='right')
+        return self.trajets.iloc[np.sort(self._ordre_dates[i:j])].reset_index()
+
+    def jour(self, plaque, date):
+        """Trajets d'un camion pour une journée (date ou chaîne 'AAAA-MM-JJ'), dans l'ordre."""
+        return self.entre(date, date, plaque)
+
+    def horaires(self, regles=None):
+        """Arrivée du matin et départ du soir par (plaque, date), voir _horaires_gps."""
+        regles = regles or REGLES_DEFAUT
+        if regles not in self._horaires:
+            self._horaires[regles] = _horaires_gps(self.table(), regles)
+        return self._horaires[regles]
+
+def horaires_gps(donnees_gps, plaques=None, regles=None):
+    """
+    Horaires matin/soir par (plaque, date) à partir d'un TrajetsGPS ou du dictionnaire
+    {plaque: {date_str: trajets}} ; `plaques` limite le résultat à ces camions,
+    `regles` (regles_depot.ReglesDepot) remplace les règles de dépôt par défaut.
+    """
+    if isinstance(donnees_gps, TrajetsGPS):
+        horaires = donnees_gps.horaires(regles)
+        return horaires if plaques is None else horaires[horaires['plaque'].isin(plaques)]
+    if plaques is not None:
+        donnees_gps = {p: jours for p, jours in donnees_gps.items() if p in plaques}
+    return _horaires_gps(table_trajets(donnees_gps), regles)
+
+def _resultats_vides():
+    return pd.DataFrame({col: pd.Series(dtype=SCHEMA_RESULTATS[col]) for col in COLONNES_RESULTATS})
+
+@mesure("Regroupement des pointages", len)
+def jours_pointage(df):
+    """
+    Une ligne par employé-jour travaillé : premier pointage d'entrée et dernière sortie
+    de travail, temps de travail et de pause cumulés. Triée par employé puis par date.
+    """
+    duree = df['Sortie'] - df['Entrée']
+    est_travail = df['Type'] == 'travail'
+    est_pause = df['Type'] == 'pause'
+    lignes = pd.DataFrame({
+        'nom_employe': df['nom_complet'],
+        'date': df['Entrée'].dt.normalize(),
+        'entree_travail': df['Entrée'].where(est_travail),
+        'sortie_travail': df['Sortie'].where(est_travail),
+        'duree_travail': duree.where(est_travail),
+        'duree_pause': duree.where(est_pause),
+    })
+
+    # Min/max/somme journaliers en une seule agrégation groupée
+    jours = lignes.groupby(['nom_employe', 'date'], sort=True, observed=True).agg(
+        pointage_debut=('entree_travail', 'min'),
+        pointage_fin=('sortie_travail', 'max'),
+        temps_travail=('duree_travail', 'sum'),
+        temps_pause=('duree_pause', 'sum'),
+    ).reset_index()
+    return jours[jours['pointage_debut'].notna()].reset_index(drop=True)
+
+@mesure("Analyse", len)
+def analyser_lot(df_pointage, donnees_gps, affectations, planning=None, regles=None):
+    """
+    Analyse en une seule passe tous les employés auxquels un camion est affecté.
+    df_pointage : pointages combinés de tous les employés (colonne nom_complet).
+    donnees_gps : {plaque: {date_str: trajets}} tel que renvoyé par charger_fichiers_gps,
+    ou un TrajetsGPS construit à partir de celui-ci.
+    affectations : {nom_employe: plaque}, les valeurs None ou "Aucun" sont ignorées.
+    planning : DataFrame facultatif (nom_employe, date, plaque_camion) donnant le camion
+    de certaines journées, prioritaire sur affectations (chauffeur qui change de camion).
+    regles : regles_depot.ReglesDepot donnant les horaires GPS du matin et du soir
+    (par défaut regles_depot.REGLES_DEFAUT).
+    Retourne un DataFrame typé selon SCHEMA_RESULTATS, d'une ligne par employé-jour,
+    trié par employé puis par date.
+    """
+    affectations = {nom: plaque for nom, plaque in affectations.items() if plaque and plaque != "Aucun"}
+    noms = set(affectations)
+    if planning is not None:
+        planning = (planning[['nom_employe', 'date', 'plaque_camion']]
+                    .astype({'nom_employe': object, 'plaque_camion': object})
+                    .drop_duplicates(['nom_employe', 'date'], keep='last'))
+        noms |= set(planning['nom_employe'])
+    df = df_pointage[df_pointage['nom_complet'].isin(noms)]
+    if df.empty:
+        return _resultats_vides()
+
+    jours = jours_pointage(df)
+    jours['plaque_camion'] = jours['nom_employe'].astype(object).map(affectations)
+    if planning is not None and not planning.empty:
+        du_jour = jours[['nom_employe', 'date']].astype({'nom_employe': object}).merge(
+            planning, on=['nom_employe', 'date'], how='left')['plaque_camion'].to_numpy()
+        jours['plaque_camion'] = np.where(pd.notna(du_jour), du_jour, jours['plaque_camion'].to_numpy())
+        # Jours d'un employé présent seulement dans le planning et sans camion ce jour-là
+        jours = jours[jours['plaque_camion'].notna()]
+
+    # Rapprochement matin/soir par jointure sur (plaque, date), limité aux camions utilisés
+    horaires = horaires_gps(donnees_gps, set(jours['plaque_camion']), regles)
+    jours = jours.merge(horaires, left_on=['plaque_camion', 'date'], right_on=['plaque', 'date'], how='left')
+    jours['ecart_matin'] = jours['gps_arrivee'] - jours['pointage_debut']
+    jours['ecart_soir'] = jours['pointage_fin'] - jours['gps_depart']
+
+    return appliquer_schema(jours[COLONNES_RESULTATS].reset_index(drop=True), SCHEMA_RESULTATS)
+
+@mesure("Analyse par employé", len)
+def analyser_donnees(df_pointage, donnees_gps, nom_employe, plaque_camion, regles=None):
+    """
+    Analyse d'un seul employé, conservée pour compatibilité : délègue à analyser_lot
+    et retourne une liste de dictionnaires, un par jour.
+    """
+    resultats = analyser_lot(
+        df_pointage.assign(nom_complet=nom_employe),
+        {plaque_camion: donnees_gps},
+        {nom_employe: plaque_camion},
+        regles=regles,
+    )
+    resultats['date'] = resultats['date'].dt.date
+    return resultats.to_dict('records')
+
+def _empreinte_table(df):
+    valeurs = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(valeurs.tobytes()).hexdigest()
+
+def empreintes_pointage(donnees_employes):
+    """
+    Empreinte des pointages de chaque employé ({nom: hash}), pour savoir si ses
+    résultats doivent être recalculés quand les fichiers sont rechargés.
+    """
+    return {nom: _empreinte_table(df[['Entrée', 'Sortie', 'Type']]) for nom, df in donnees_employes.items()}
 
-            resultat_jour['gps_arrivee'] = pd.to_datetime(f"{date_str} {trajets_du_jour[0]['heure_arrivee'].strftime('%H:%M:%S')}")
-            resultat_jour['ecart_matin'] = resultat_jour['gps_arrivee'] - resultat_jour['pointage_debut']
-            
-            dernier_depart_valide = pd.NaT
-            for trajet in reversed(trajets_du_jour):
-                lieu = str(trajet.get('lieu_arrivee', ""))
-                try:
-                    depart_dt = pd.to_datetime(f"{date_str} {trajet['heure_depart'].strftime('%H:%M:%S')}")
-                    arrivee_dt = pd.to_datetime(f"{date_str} {trajet['heure_arrivee'].strftime('%H:%M:%S')}")
-                    duree_minutes = (arrivee_dt - depart_dt).total_seconds() / 60
-                except Exception:
-                    duree_minutes = 0
-
-                if duree_minutes >= 25 and "Gardanne" in lieu:
-                    dernier_depart_valide = depart_dt
-                    break
-            
-            if pd.notna(dernier_depart_valide):
-                resultat_jour['gps_depart'] = dernier_depart_valide
-                resultat_jour['ecart_soir'] = resultat_jour['pointage_fin'] - resultat_jour['gps_depart']
-
-        resultats_analyses.append(resultat_jour)
-    return resultats_analyses
\ No newline at end of file
+def empreintes_gps(donnees_gps):
+    """Empreinte des trajets de chaque camion ({plaque: hash}) ; un camion sans trajet n'en a pas."""
+    trajets = table_trajets(donnees_gps)
+    return {
+        plaque: _empreinte_table(groupe.drop(columns='plaque'))
+        for plaque, groupe in trajets.groupby('plaque', observed=True)
+    }
@@ -0,0 +1,160 @@
+# benchmarks/bench_horaires_gps.py
+
+"""
+Micro-benchmark du calcul des horaires GPS (arrivée du matin, départ du soir) :
+ancienne boucle par trajet (strftime + f-string + pd.to_datetime) contre les
+heures stockées en timedelta64 et le calcul vectorisé d'analyse_core. Vérifie aussi
+des règles à plusieurs dépôts (regles_depot) contre une boucle trajet par trajet.
+
+    python -m benchmarks.bench_horaires_gps [--camions 20] [--jours 60] [--trajets 10]
+"""
+
+import argparse
+import datetime
+import random
+import time
+
+import pandas as pd
+
+import analyse_core
+from benchmarks.generateurs import DEPOT, generer_trajets_jour
+from regles_depot import ReglesDepot
+
+DEPOT_SECONDAIRE = "Dépôt FOS-SUR-MER"
+
+
+def horaires_ancienne_boucle(donnees_gps):
+    """Reproduction du bloc GPS de l'ancien analyser_donnees, pour chaque plaque/jour."""
+    horaires = {}
+    for plaque, jours in donnees_gps.items():
+        for date_str, trajets_du_jour in jours.items():
+            gps_arrivee = pd.to_datetime(f"{date_str} {trajets_du_jour[0]['heure_arrivee'].strftime('%H:%M:%S')}")
+            dernier_depart_valide = pd.NaT
+            for trajet in reversed(trajets_du_jour):
+                lieu = str(trajet.get('lieu_arrivee', ""))
+                try:
+                    depart_dt = pd.to_datetime(f"{date_str} {trajet['heure_depart'].strftime('%H:%M:%S')}")
+                    arrivee_dt = pd.to_datetime(f"{date_str} {trajet['heure_arrivee'].strftime('%H:%M:%S')}")
+                    duree_minutes = (arrivee_dt - depart_dt).total_seconds() / 60
+                except Exception:
+                    duree_minutes = 0
+                if duree_minutes >= 25 and "Gardanne" in lieu:
+                    dernier_depart_valide = depart_dt
+                    break
+            horaires[(plaque, date_str)] = (gps_arrivee, dernier_depart_valide)
+    return horaires
+
+
+def horaires_vectorises(donnees_gps):
+    return analyse_core._horaires_gps(analyse_core.table_trajets(donnees_gps))
+
+
+def regles_deux_depots(plaques_secondaires):
+    return ReglesDepot.depuis_dict({
+        'matin': 'premier_hors_depot',
+        'depots': [
+            {'nom': DEPOT, 'lieu': DEPOT, 'duree_min': 25},
+            {'nom': "Fos", 'regex': r"fos[- ]sur[- ]mer", 'ignorer_casse': True, 'duree_min': 35,
+             'plaques': sorted(plaques_secondaires)},
+        ],
+    })
+
+
+def horaires_boucle_regles(table, plaques_secondaires):
+    """Mêmes règles que regles_deux_depots, testées trajet par trajet."""
+    horaires = {}
+    for (plaque, date), trajets in table.sort_values(['plaque', 'date', 'ordre']).groupby(['plaque', 'date']):
+        def vers_depot(trajet):
+            return DEPOT in trajet.lieu_arrivee or (
+                plaque in plaques_secondaires and "fos-sur-mer" in trajet.lieu_arrivee.lower())
+
+        def duree_min(trajet):
+            return 25 if DEPOT in trajet.lieu_arrivee else 35
+
+        lignes = list(trajets.itertuples())
+        arrivee = next((t.arrivee for t in lignes if not vers_depot(t)), pd.NaT)
+        depart = next((t.depart for t in reversed(lignes)
+                       if vers_depot(t) and t.arrivee - t.depart >= pd.Timedelta(minutes=duree_min(t))), pd.NaT)
+        horaires[(plaque, f"{date:%Y-%m-%d}")] = (arrivee, depart)
+    return horaires
+
+
+def verifier(obtenu, attendu):
+    """Mêmes horaires pour chaque plaque/jour."""
+    for ligne in obtenu.itertuples(index=False):
+        arrivee, depart = attendu[(ligne.plaque, f"{ligne.date:%Y-%m-%d}")]
+        assert (pd.isna(ligne.gps_arrivee) and pd.isna(arrivee)) or ligne.gps_arrivee == arrivee
+        assert (pd.isna(ligne.gps_depart) and pd.isna(depart)) or ligne.gps_depart == depart
+    assert len(obtenu) == len(attendu)
+
+
+def generer_donnees(nb_camions, nb_jours, nb_trajets, graine=0):
+    """Retourne les mêmes trajets sous l'ancien format (listes de dicts) et le nouveau."""
+    rng = random.Random(graine)
+    ancien, nouveau = {}, {}
+    for c in range(nb_camions):
+        plaque = f"CAMION {c:03d}"
+        ancien[plaque], nouveau[plaque] = {}, {}
+        for j in range(nb_jours):
+            date_str = (datetime.date(2024, 1, 1) + datetime.timedelta(days=j)).strftime('%Y-%m-%d')
+            trajets = generer_trajets_jour(rng, nb_trajets)
+            ancien[plaque][date_str] = [
+                {'heure_depart': h_dep, 'heure_arrivee': h_arr, 'lieu_arrivee': lieu_arr}
+                for _, h_dep, lieu_arr, h_arr in trajets
+            ]
+            nouveau[plaque][date_str] = pd.DataFrame({
+                'heure_depart': analyse_core.heures_vers_timedelta([t[1] for t in trajets]),
+                'heure_arrivee': analyse_core.heures_vers_timedelta([t[3] for t in trajets]),
+                'lieu_arrivee': [t[2] for t in trajets],
+            })
+    return ancien, nouveau
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--camions', type=int, default=20)
+    parser.add_argument('--jours', type=int, default=60)
+    parser.add_argument('--trajets', type=int, default=10)
+    args = parser.parse_args()
+
+    ancien, nouveau = generer_donnees(args.camions, args.jours, args.trajets)
+
+    debut = time.perf_counter()
+    attendu = horaires_ancienne_boucle(ancien)
+    t_ancien = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    obtenu = horaires_vectorises(nouveau)
+    t_nouveau = time.perf_counter() - debut
+
+    verifier(obtenu, attendu)
+
+    print(f"{len(attendu)} plaques-jours, {args.trajets} trajets/jour")
+    print(f"strftime + to_datetime : {t_ancien * 1000:9.1f} ms")
+    print(f"timedelta64 vectorisé  : {t_nouveau * 1000:9.1f} ms")
+    print(f"accélération           : x{t_ancien / t_nouveau:.1f}")
+
+    # Deux dépôts : un camion sur deux rentre au dépôt secondaire, réservé à ces camions
+    table = analyse_core.table_trajets(nouveau)
+    table['plaque'] = table['plaque'].astype(object)
+    plaques_secondaires = set(sorted(nouveau)[1::2])
+    secondaire = table['plaque'].isin(plaques_secondaires) & (table['lieu_arrivee'] == DEPOT)
+    table.loc[secondaire, 'lieu_arrivee'] = DEPOT_SECONDAIRE
+    regles = regles_deux_depots(plaques_secondaires)
+
+    debut = time.perf_counter()
+    attendu = horaires_boucle_regles(table, plaques_secondaires)
+    t_boucle = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    obtenu = regles.horaires(table)
+    t_regles = time.perf_counter() - debut
+
+    verifier(obtenu, attendu)
+    print(f"deux dépôts, boucle    : {t_boucle * 1000:9.1f} ms")
+    print(f"deux dépôts, masques   : {t_regles * 1000:9.1f} ms")
+    print(f"accélération           : x{t_boucle / t_regles:.1f}")
+
+
+if __name__ == '__main__':
+    main()
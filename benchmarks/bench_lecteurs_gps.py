@@ -0,0 +1,57 @@
+# benchmarks/bench_lecteurs_gps.py
+
+"""
+Compare les temps de lecture des lecteurs de classeurs GPS d'analyse_core
+(LECTEURS_GPS) : lecteur pandas d'origine, lecture en flux openpyxl arrêtée après le
+bloc de trajets, et calamine s'il est installé. L'égalité des trajets lus par chaque
+lecteur, y compris sur les feuilles atypiques (generateurs.generer_classeur_atypique),
+est vérifiée par tests/test_lecteurs_gps.py.
+
+    python -m benchmarks.bench_lecteurs_gps [--camions 10] [--semaines 4] [--trajets 12]
+"""
+
+import argparse
+import tempfile
+import time
+
+import analyse_core
+from benchmarks.generateurs import generer_fichiers_gps
+
+
+def lecteurs_disponibles():
+    lecteurs = ['pandas', 'flux']
+    if analyse_core._calamine_disponible():
+        lecteurs.append('calamine')
+    return lecteurs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--camions', type=int, default=10)
+    parser.add_argument('--semaines', type=int, default=4)
+    parser.add_argument('--trajets', type=int, default=12)
+    parser.add_argument('--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    dossier = tempfile.mkdtemp(prefix='gps_')
+    chemins = generer_fichiers_gps(dossier, args.camions, args.semaines, nb_trajets=args.trajets)
+    print(f"{len(chemins)} classeurs GPS dans {dossier}")
+
+    temps = {}
+    for lecteur in lecteurs_disponibles():
+        mesures = []
+        for _ in range(args.repetitions):
+            debut = time.perf_counter()
+            analyse_core.charger_fichiers_gps(chemins, lecteur=lecteur)
+            mesures.append(time.perf_counter() - debut)
+        temps[lecteur] = min(mesures)
+
+    print(f"Lecteur par défaut : {analyse_core.lecteur_gps_par_defaut()}")
+    if 'calamine' not in temps:
+        print("  calamine   non mesuré : python-calamine n'est pas installé")
+    for lecteur, secondes in temps.items():
+        print(f"  {lecteur:<10} {secondes * 1000:9.1f} ms  (x{temps['pandas'] / secondes:.2f})")
+
+
+if __name__ == '__main__':
+    main()
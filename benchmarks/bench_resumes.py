@@ -0,0 +1,65 @@
+# benchmarks/bench_resumes.py
+
+"""
+Compare les résumés employé par employé (resume_ecart.generer_resume, trois
+rééchantillonnages par employé) au résumé de tous les employés en un passage
+(resume_ecart.generer_resumes), et vérifie qu'ils donnent les mêmes valeurs.
+
+    python -m benchmarks.bench_resumes [--employes 100] [--mois 3]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import analyse_core
+import resume_ecart
+from benchmarks.generateurs import generer_gps, generer_pointages
+
+
+def resumes_par_employe(resultats):
+    return {nom: resume_ecart.generer_resume(groupe)
+            for nom, groupe in resultats.groupby('nom_employe', observed=True)}
+
+
+def verifier(par_employe, tidy):
+    for nom, (moyenne_semaine, moyenne_mois, total_mois, jours) in par_employe.items():
+        semaines = tidy[(tidy['nom_employe'] == nom) & (tidy['periode'] == 'semaine')]
+        mois = tidy[(tidy['nom_employe'] == nom) & (tidy['periode'] == 'mois')]
+        assert np.allclose(semaines['ecart_matin_moyen'], moyenne_semaine['ecart_matin_min'], equal_nan=True)
+        assert np.allclose(semaines['ecart_soir_moyen'], moyenne_semaine['ecart_soir_min'], equal_nan=True)
+        assert np.allclose(mois['ecart_matin_moyen'], moyenne_mois['ecart_matin_min'], equal_nan=True)
+        assert np.allclose(mois['ecart_soir_total'], total_mois['ecart_soir_min'])
+        assert mois['nb_jours'].sum() == jours
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employes', type=int, default=100)
+    parser.add_argument('--mois', type=int, default=3)
+    args = parser.parse_args()
+
+    pointages = analyse_core.appliquer_schema(generer_pointages(args.employes, args.mois), analyse_core.SCHEMA_POINTAGE)
+    noms = sorted(pointages['nom_complet'].unique())
+    plaques = [f"CAMION {i:03d}" for i in range(len(noms))]
+    jours = pointages['Entrée'].dt.normalize().unique()
+    resultats = analyse_core.analyser_lot(pointages, generer_gps(plaques, jours), dict(zip(noms, plaques)))
+
+    debut = time.perf_counter()
+    par_employe = resumes_par_employe(resultats)
+    t_boucle = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    tidy = resume_ecart.generer_resumes(resultats)
+    t_passage = time.perf_counter() - debut
+
+    verifier(par_employe, tidy)
+    print(f"{len(noms)} employés, {len(resultats)} employé-jours, {len(tidy)} lignes de résumé")
+    print(f"generer_resume par employé : {t_boucle * 1000:9.1f} ms")
+    print(f"generer_resumes            : {t_passage * 1000:9.1f} ms")
+    print(f"accélération               : x{t_boucle / t_passage:.1f}")
+
+
+if __name__ == '__main__':
+    main()
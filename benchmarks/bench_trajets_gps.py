@@ -0,0 +1,84 @@
+# benchmarks/bench_trajets_gps.py
+
+"""
+Compare l'extraction ligne à ligne des trajets GPS (ancienne version avec
+itertuples/iterrows) à l'extraction vectorisée d'analyse_core.extraire_trajets.
+
+    python -m benchmarks.bench_trajets_gps [--camions 10] [--semaines 4] [--trajets 12]
+"""
+
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+import analyse_core
+from benchmarks.generateurs import generer_fichiers_gps
+
+
+def extraire_trajets_iterrows(df_jour):
+    """Reproduction de l'ancienne boucle de charger_fichiers_gps."""
+    start_row_index = -1
+    for row in df_jour.itertuples():
+        if isinstance(row[2], str) and row[2].strip().startswith("Trajet n"):
+            start_row_index = row.Index + 1; break
+    if start_row_index == -1: return []
+
+    trajets_data = []
+    for _, row in df_jour.iloc[start_row_index:].iterrows():
+        if pd.notna(row[1]) and pd.notna(row[3]):
+            trajets_data.append({
+                'heure_depart': row[3],
+                'heure_arrivee': row[5],
+                'lieu_arrivee': row[4]
+            })
+        elif pd.isna(row[1]): break
+    return trajets_data
+
+
+def chronometrer(fonction, feuilles, repetitions):
+    meilleur = float('inf')
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        for df_jour in feuilles:
+            fonction(df_jour)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--camions', type=int, default=10)
+    parser.add_argument('--semaines', type=int, default=4)
+    parser.add_argument('--trajets', type=int, default=12)
+    parser.add_argument('--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemins = generer_fichiers_gps(dossier, args.camions, args.semaines, nb_trajets=args.trajets)
+        feuilles = []
+        for chemin in chemins:
+            xls = pd.ExcelFile(chemin)
+            for sheet_name in xls.sheet_names[1:6]:
+                feuilles.append(pd.read_excel(xls, sheet_name=sheet_name, header=None))
+
+    # Les deux versions doivent extraire exactement les mêmes trajets
+    for df_jour in feuilles:
+        attendu = pd.DataFrame(extraire_trajets_iterrows(df_jour), columns=analyse_core.COLONNES_TRAJETS)
+        attendu['lieu_arrivee'] = attendu['lieu_arrivee'].astype(str)
+        for col in ('heure_depart', 'heure_arrivee'):
+            attendu[col] = analyse_core.heures_vers_timedelta(attendu[col].to_numpy(dtype=object))
+        obtenu = analyse_core.extraire_trajets(df_jour)
+        pd.testing.assert_frame_equal(obtenu, attendu, check_dtype=False)
+
+    t_ancien = chronometrer(extraire_trajets_iterrows, feuilles, args.repetitions)
+    t_nouveau = chronometrer(analyse_core.extraire_trajets, feuilles, args.repetitions)
+    print(f"{len(chemins)} classeurs, {len(feuilles)} feuilles jour, {args.trajets} trajets/jour")
+    print(f"itertuples/iterrows : {t_ancien * 1000:8.1f} ms")
+    print(f"vectorisé           : {t_nouveau * 1000:8.1f} ms")
+    print(f"accélération        : x{t_ancien / t_nouveau:.1f}")
+
+
+if __name__ == '__main__':
+    main()
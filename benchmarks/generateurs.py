@@ -0,0 +1,223 @@
+# benchmarks/generateurs.py
+
+"""
+Générateurs de données synthétiques reproduisant le format des exports de badgeuse
+(pointage) et des exports GPS, pour mesurer analyse_core sans données réelles :
+en mémoire (generer_pointages, generer_gps) ou en classeurs Excel
+(generer_fichiers_pointage, generer_fichiers_gps), et un classeur GPS dont les
+feuilles couvrent les cas limites de la lecture (generer_classeur_atypique).
+
+Les deux couvrent les mêmes jours ouvrés à partir d'un même lundi : 22 jours par mois,
+soit semaines_pour_mois(nb_mois) semaines de classeurs GPS.
+"""
+
+import datetime
+import os
+import random
+
+import pandas as pd
+from openpyxl import Workbook
+
+import analyse_core
+
+JOURS_SEMAINE = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi"]
+JOURS_OUVRES_PAR_MOIS = 22
+LIEUX_CHANTIER = ["Marseille", "Aix-en-Provence", "Vitrolles", "Aubagne", "Martigues", "Istres"]
+DEPOT = "Gardanne"
+NOMS = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau"]
+PRENOMS = ["Jean", "Pierre", "Michel", "André", "Philippe", "Nicolas", "Christophe", "Laurent", "Julien", "Karim"]
+
+
+def plaque_aleatoire(rng):
+    lettres = "ABCDEFGHJKLMNPQRSTVWXYZ"
+    return (f"{rng.choice(lettres)}{rng.choice(lettres)}-{rng.randint(100, 999)}-"
+            f"{rng.choice(lettres)}{rng.choice(lettres)}")
+
+
+def _heure(minutes):
+    minutes = max(0, min(minutes, 23 * 60 + 59))
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def generer_trajets_jour(rng, nb_trajets=8):
+    """Retourne une liste de (lieu_depart, heure_depart, lieu_arrivee, heure_arrivee)."""
+    trajets = []
+    t = rng.randint(5 * 60 + 30, 6 * 60 + 30)
+    lieu = DEPOT
+    for i in range(nb_trajets):
+        retour_depot = (i == nb_trajets - 1)
+        destination = DEPOT if retour_depot else rng.choice(LIEUX_CHANTIER)
+        duree = rng.randint(30, 55) if retour_depot else rng.randint(10, 45)
+        trajets.append((lieu, _heure(t), destination, _heure(t + duree)))
+        t += duree + rng.randint(10, 60)
+        lieu = destination
+    return trajets
+
+
+def ecrire_feuille_jour(ws, date_jour, trajets):
+    ws["A1"] = "Rapport de trajets"
+    ws["A5"] = "Date :"
+    ws["B5"] = datetime.datetime.combine(date_jour, datetime.time())
+    ligne = 8
+    for col, titre in enumerate(["Trajet n°", "Lieu de départ", "Heure de départ",
+                                 "Lieu d'arrivée", "Heure d'arrivée"], start=2):
+        ws.cell(row=ligne, column=col, value=titre)
+    for i, (lieu_dep, h_dep, lieu_arr, h_arr) in enumerate(trajets, start=1):
+        ligne += 1
+        ws.cell(row=ligne, column=2, value=i)
+        ws.cell(row=ligne, column=3, value=lieu_dep)
+        ws.cell(row=ligne, column=4, value=h_dep)
+        ws.cell(row=ligne, column=5, value=lieu_arr)
+        ws.cell(row=ligne, column=6, value=h_arr)
+    # Bloc de totaux après une ligne vide, comme dans les exports réels
+    ws.cell(row=ligne + 2, column=2, value="Total")
+    ws.cell(row=ligne + 2, column=4, value=len(trajets))
+
+
+def generer_classeur_gps(dossier, plaque, lundi, rng, nb_trajets=8):
+    """
+    Écrit un classeur GPS d'une semaine (1 feuille de synthèse + 5 feuilles jour)
+    et retourne son chemin.
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Synthèse"
+    ws["A1"] = f"Véhicule {plaque}"
+    for i, nom_jour in enumerate(JOURS_SEMAINE):
+        date_jour = lundi + datetime.timedelta(days=i)
+        ecrire_feuille_jour(wb.create_sheet(nom_jour), date_jour, generer_trajets_jour(rng, nb_trajets))
+    chemin = os.path.join(dossier, f"Trajets véhicule {plaque} semaine du {lundi:%d-%m-%Y}.xlsx")
+    wb.save(chemin)
+    return chemin
+
+
+def generer_fichiers_gps(dossier, nb_camions=5, nb_semaines=4, debut=datetime.date(2024, 1, 1),
+                         nb_trajets=8, graine=0):
+    """Génère un classeur par camion et par semaine, retourne la liste des chemins."""
+    rng = random.Random(graine)
+    os.makedirs(dossier, exist_ok=True)
+    lundi = debut - datetime.timedelta(days=debut.weekday())
+    chemins = []
+    for _ in range(nb_camions):
+        plaque = plaque_aleatoire(rng)
+        for s in range(nb_semaines):
+            chemins.append(generer_classeur_gps(dossier, plaque, lundi + datetime.timedelta(weeks=s),
+                                                rng, nb_trajets))
+    return chemins
+
+
+def generer_classeur_atypique(dossier, graine=0):
+    """Un classeur dont les feuilles journalières couvrent les cas limites de la lecture."""
+    rng = random.Random(graine)
+    lundi = datetime.date(2024, 1, 1)
+    wb = Workbook()
+    wb.active.title = "Synthèse"
+    # Journée normale suivie d'un long tableau de totaux
+    ws = wb.create_sheet("Lundi")
+    ecrire_feuille_jour(ws, lundi, generer_trajets_jour(rng))
+    for ligne in range(30, 400):
+        ws.cell(row=ligne, column=2, value=f"Arrêt {ligne}")
+        ws.cell(row=ligne, column=7, value=ligne)
+    # Sans date en B5
+    ws = wb.create_sheet("Mardi")
+    ecrire_feuille_jour(ws, lundi + datetime.timedelta(days=1), generer_trajets_jour(rng))
+    ws["B5"] = None
+    # Date en texte, lieux numériques, une heure manquante et un trajet sans départ
+    ws = wb.create_sheet("Mercredi")
+    trajets = [(d, h_dep, 13000 + i, h_arr) for i, (d, h_dep, _, h_arr) in enumerate(generer_trajets_jour(rng))]
+    ecrire_feuille_jour(ws, lundi + datetime.timedelta(days=2), trajets)
+    ws["B5"] = "03/01/2024"
+    ws.cell(row=10, column=6, value=None)
+    ws.cell(row=11, column=4, value=None)
+    # Textes que pandas lit comme manquants, erreur Excel, et numéro non numérique prolongeant le bloc
+    ws.cell(row=12, column=5, value="NA")
+    ws.cell(row=13, column=5, value="#DIV/0!")
+    fin_bloc = 8 + len(trajets) + 1
+    for colonne, valeur in zip(range(2, 7), ["-", "Vitrolles", datetime.time(18, 5), "Gardanne", datetime.time(18, 40)]):
+        ws.cell(row=fin_bloc, column=colonne, value=valeur)
+    # Journée sans trajet : aucun texte en colonne B, feuille d'au moins 6 colonnes
+    ws = wb.create_sheet("Jeudi")
+    ws["B5"] = datetime.datetime(2024, 1, 4)
+    ws["A8"] = "Aucun trajet"
+    ws["B8"] = 0
+    ws["G8"] = 0
+    # Feuille vide
+    wb.create_sheet("Vendredi")
+    chemin = os.path.join(dossier, "Trajets véhicule ZZ-999-ZZ semaine du 01-01-2024.xlsx")
+    wb.save(chemin)
+    return chemin
+
+
+def semaines_pour_mois(nb_mois):
+    """Nombre de semaines de classeurs GPS couvrant les jours ouvrés de nb_mois mois."""
+    return -(-JOURS_OUVRES_PAR_MOIS * nb_mois // len(JOURS_SEMAINE))
+
+
+def generer_gps(plaques, jours, graine=0):
+    """Données GPS en mémoire, au format de charger_fichiers_gps : {plaque: {date: trajets}}."""
+    rng = random.Random(graine)
+    donnees = {}
+    for plaque in plaques:
+        donnees[plaque] = {}
+        for jour in jours:
+            trajets = generer_trajets_jour(rng, 8)
+            donnees[plaque][f"{jour:%Y-%m-%d}"] = pd.DataFrame({
+                'heure_depart': analyse_core.heures_vers_timedelta([t[1] for t in trajets]),
+                'heure_arrivee': analyse_core.heures_vers_timedelta([t[3] for t in trajets]),
+                'lieu_arrivee': [t[2] for t in trajets],
+            })
+    return donnees
+
+
+def generer_pointages(nb_employes, nb_mois, graine=0, debut=datetime.date(2024, 1, 1)):
+    """
+    Pointages tels que renvoyés par la lecture Excel : textes en object, horodatages en
+    datetime64. Chaque jour ouvré : travail, pause, travail.
+    """
+    rng = random.Random(graine)
+    lignes = []
+    jours = pd.bdate_range(debut, periods=JOURS_OUVRES_PAR_MOIS * nb_mois)
+    for e in range(nb_employes):
+        nom, prenom = f"{NOMS[e % len(NOMS)]}{e // len(NOMS) or ''}", PRENOMS[(e * 7) % len(PRENOMS)]
+        for jour in jours:
+            debut_jour = jour + pd.Timedelta(minutes=rng.randint(330, 420))
+            pause = debut_jour + pd.Timedelta(hours=rng.randint(4, 5))
+            reprise = pause + pd.Timedelta(minutes=rng.choice([30, 45, 60]))
+            fin = reprise + pd.Timedelta(hours=rng.randint(3, 4))
+            lignes += [(nom, prenom, debut_jour, pause, 'travail'), (nom, prenom, pause, reprise, 'pause'),
+                       (nom, prenom, reprise, fin, 'travail')]
+    df = pd.DataFrame(lignes, columns=['Nom', 'Prénom', 'Entrée', 'Sortie', 'Type'])
+    df['nom_complet'] = df['Prénom'] + ' ' + df['Nom']
+    return df
+
+
+def ecrire_classeur_pointage(chemin, pointages, horodatages_texte=True):
+    """
+    Écrit un export de badgeuse : une ligne de titre, l'en-tête Nom/Prénom/Entrée/Sortie/Type
+    sur la 2e ligne (lue avec header=1), puis une ligne par pointage. Les horodatages sont
+    écrits en texte jj/mm/aaaa hh:mm comme dans les exports réels, ou en dates Excel.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Pointages")
+    ws.append(["Export badgeuse"])
+    ws.append(['Nom', 'Prénom', 'Entrée', 'Sortie', 'Type'])
+    entrees, sorties = pointages['Entrée'], pointages['Sortie']
+    if horodatages_texte:
+        entrees, sorties = entrees.dt.strftime('%d/%m/%Y %H:%M'), sorties.dt.strftime('%d/%m/%Y %H:%M')
+    else:
+        entrees, sorties = entrees.astype(object), sorties.astype(object)
+    for ligne in zip(pointages['Nom'], pointages['Prénom'], entrees, sorties, pointages['Type']):
+        ws.append(ligne)
+    wb.save(chemin)
+    return chemin
+
+
+def generer_fichiers_pointage(dossier, nb_employes=20, nb_mois=1, graine=0, horodatages_texte=True):
+    """Génère un export de badgeuse par mois calendaire, retourne la liste des chemins."""
+    os.makedirs(dossier, exist_ok=True)
+    pointages = generer_pointages(nb_employes, nb_mois, graine)
+    chemins = []
+    for mois, lignes in pointages.groupby(pointages['Entrée'].dt.to_period('M'), sort=True):
+        chemin = os.path.join(dossier, f"Pointages {mois}.xlsx")
+        chemins.append(ecrire_classeur_pointage(chemin, lignes, horodatages_texte))
+    return chemins
@@ -0,0 +1,113 @@
+# benchmarks/mesure_demarrage.py
+
+"""
+Mesure du démarrage de l'interface : temps d'import par paquet (python -X importtime)
+et délai jusqu'au premier affichage de la fenêtre principale. Vérifie aussi que
+pandas n'est pas encore importé à ce moment-là (il ne l'est qu'au premier chargement).
+
+    python -m benchmarks.mesure_demarrage [--repetitions 5] [--max-ms 1500]
+
+Avec --max-ms, le script se termine en erreur si le premier affichage médian dépasse
+le seuil, ce qui permet de l'utiliser comme garde-fou contre une régression.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Exécuté dans un processus neuf : crée la fenêtre et mesure jusqu'au premier Paint
+SCRIPT_PREMIER_AFFICHAGE = r"""
+import json, sys, time
+debut = time.perf_counter()
+from PyQt6.QtCore import QObject, QEvent, QTimer
+from PyQt6.QtWidgets import QApplication
+import gui
+
+class PremierAffichage(QObject):
+    def eventFilter(self, objet, evenement):
+        if evenement.type() == QEvent.Type.Paint:
+            terminer()
+        return False
+
+def terminer():
+    if not app.property('mesure_faite'):
+        app.setProperty('mesure_faite', True)
+        print(json.dumps({'ms': (time.perf_counter() - debut) * 1000,
+                          'pandas_importe': 'pandas' in sys.modules}))
+        app.quit()
+
+app = QApplication(sys.argv)
+filtre = PremierAffichage()
+window = gui.AnalyseurMainWindow()
+window.installEventFilter(filtre)
+window.show()
+# Certaines plateformes (offscreen) n'envoient pas toujours de Paint : repli après le premier tour de boucle
+QTimer.singleShot(0, terminer)
+app.exec()
+"""
+
+
+def temps_imports(module='gui'):
+    """Temps d'import cumulé (ms) par paquet de premier niveau, d'après -X importtime."""
+    sortie = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=RACINE, capture_output=True, text=True, env=_environnement())
+    par_paquet = defaultdict(float)
+    for ligne in sortie.stderr.splitlines():
+        if not ligne.startswith('import time:') or 'self [us]' in ligne:
+            continue
+        try:
+            soi, _, nom = ligne[len('import time:'):].split('|')
+            par_paquet[nom.strip().split('.')[0]] += int(soi) / 1000
+        except ValueError:
+            continue
+    return dict(sorted(par_paquet.items(), key=lambda item: item[1], reverse=True))
+
+
+def premier_affichage():
+    sortie = subprocess.run([sys.executable, '-c', SCRIPT_PREMIER_AFFICHAGE],
+                            cwd=RACINE, capture_output=True, text=True, env=_environnement())
+    if sortie.returncode != 0:
+        raise RuntimeError(sortie.stderr.strip())
+    return json.loads(sortie.stdout.strip().splitlines()[-1])
+
+
+def _environnement():
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--paquets', type=int, default=10, help="nombre de paquets affichés")
+    parser.add_argument('--max-ms', type=float, help="seuil du premier affichage médian")
+    args = parser.parse_args()
+
+    imports = temps_imports()
+    print(f"Imports de gui (ms, {sum(imports.values()):.0f} au total)")
+    for nom, ms in list(imports.items())[:args.paquets]:
+        print(f"  {nom:<20} {ms:8.1f}")
+
+    mesures = [premier_affichage() for _ in range(args.repetitions)]
+    mediane = statistics.median(m['ms'] for m in mesures)
+    print(f"Premier affichage : médiane {mediane:.0f} ms sur {args.repetitions} lancements")
+
+    erreurs = []
+    if any(m['pandas_importe'] for m in mesures):
+        erreurs.append("pandas est importé avant le premier affichage")
+    if args.max_ms is not None and mediane > args.max_ms:
+        erreurs.append(f"premier affichage {mediane:.0f} ms > seuil {args.max_ms:.0f} ms")
+    for erreur in erreurs:
+        print(f"ÉCHEC : {erreur}", file=sys.stderr)
+    return 1 if erreurs else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
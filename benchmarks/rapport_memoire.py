@@ -0,0 +1,64 @@
+# benchmarks/rapport_memoire.py
+
+"""
+Rapport mémoire du schéma compact (analyse_core.SCHEMA_POINTAGE / SCHEMA_RESULTATS)
+sur un jeu de données employé-mois réaliste : pointages en chaînes object contre
+catégories, résultats en liste de dictionnaires contre DataFrame typé.
+
+    python -m benchmarks.rapport_memoire [--employes 60] [--mois 1]
+"""
+
+import argparse
+import tracemalloc
+
+import pandas as pd
+
+import analyse_core
+from benchmarks.generateurs import generer_gps, generer_pointages
+
+
+def memoire_allouee(fabrique):
+    """Mémoire encore allouée (octets) par l'objet que construit `fabrique`."""
+    tracemalloc.start()
+    objet = fabrique()
+    taille, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objet
+    return taille
+
+
+def mo(octets):
+    return f"{octets / 1024 / 1024:8.2f} Mo"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employes', type=int, default=60)
+    parser.add_argument('--mois', type=int, default=1)
+    args = parser.parse_args()
+
+    pointages = generer_pointages(args.employes, args.mois)
+    compact = analyse_core.appliquer_schema(pointages.copy(), analyse_core.SCHEMA_POINTAGE)
+    avant = pointages.memory_usage(deep=True).sum()
+    apres = compact.memory_usage(deep=True).sum()
+
+    noms = sorted(pointages['nom_complet'].unique())
+    plaques = [f"CAMION {i:03d}" for i in range(max(1, len(noms) // 2))]
+    jours = pd.to_datetime(pointages['Entrée']).dt.normalize().unique()
+    donnees_gps = generer_gps(plaques, jours)
+    affectations = {nom: plaques[i % len(plaques)] for i, nom in enumerate(noms)}
+    resultats = analyse_core.analyser_lot(compact, donnees_gps, affectations)
+    res_dicts = memoire_allouee(lambda: resultats.to_dict('records'))
+    res_typees = resultats.memory_usage(deep=True).sum()
+
+    print(f"{args.employes} employés, {args.mois} mois : {len(pointages)} pointages, {len(resultats)} employé-jours")
+    print("Pointages")
+    print(f"  textes object        : {mo(avant)}")
+    print(f"  schéma compact       : {mo(apres)}  (x{avant / apres:.1f} plus petit)")
+    print("Résultats d'analyse")
+    print(f"  liste de dict        : {mo(res_dicts)}")
+    print(f"  DataFrame typé       : {mo(res_typees)}  (x{res_dicts / res_typees:.1f} plus petit)")
+
+
+if __name__ == '__main__':
+    main()
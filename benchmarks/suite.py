@@ -0,0 +1,190 @@
+# benchmarks/suite.py
+
+"""
+Suite de mesures de bout en bout sur des classeurs synthétiques (benchmarks.generateurs) :
+lecture des pointages et des GPS, analyse, résumés. Pour chaque étape sont relevés
+le temps (médiane des répétitions) et le pic de mémoire allouée (tracemalloc, mesuré
+sur une exécution à part pour ne pas fausser les temps). Les résultats sont écrits
+en JSON ; avec --reference, ils sont comparés à une mesure précédente et le script
+se termine en erreur si une étape a ralenti au-delà de --tolerance.
+
+    python -m benchmarks.suite [--employes 40] [--camions 20] [--mois 1] [--repetitions 3]
+                               [--sortie mesures.json] [--reference ancienne.json]
+
+Les pointages et les GPS sont lus sans cache et dans ce processus (nb_processus=1),
+pour ne mesurer que le code d'analyse_core et de resume_ecart.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+import analyse_core
+import resume_ecart
+from benchmarks.generateurs import generer_fichiers_gps, generer_fichiers_pointage, semaines_pour_mois
+
+# En dessous, une étape est trop courte pour que son ralentissement soit significatif
+DUREE_MIN_COMPARAISON = 0.005
+
+
+def generer_entrees(dossier, nb_employes, nb_camions, nb_mois, graine=0):
+    """Écrit les classeurs de pointage et GPS, retourne (chemins pointage, chemins GPS)."""
+    pointage = generer_fichiers_pointage(os.path.join(dossier, 'pointage'), nb_employes, nb_mois, graine)
+    gps = generer_fichiers_gps(os.path.join(dossier, 'gps'), nb_camions, semaines_pour_mois(nb_mois), graine=graine)
+    return pointage, gps
+
+
+def affectations(contexte):
+    """Employés répartis à tour de rôle sur les camions, dans l'ordre alphabétique."""
+    plaques = sorted(contexte['gps'])
+    return {nom: plaques[i % len(plaques)] for i, nom in enumerate(sorted(contexte['pointage']))}
+
+
+def etapes(chemins_pointage, chemins_gps):
+    """
+    Étapes mesurées, dans l'ordre : (nom, fonction(contexte) -> (valeur, nb_lignes)).
+    Chaque étape lit ses entrées dans `contexte` et y range sa valeur sous son nom.
+    """
+    def pointage(_):
+        employes = analyse_core.charger_fichier_pointage(chemins_pointage)
+        return employes, sum(len(df) for df in employes.values())
+
+    def gps(_):
+        donnees = analyse_core.charger_fichiers_gps(chemins_gps)
+        return donnees, sum(len(trajets) for jours in donnees.values() for trajets in jours.values())
+
+    def analyse(contexte):
+        df_pointage = pd.concat(list(contexte['pointage'].values()), ignore_index=True)
+        resultats = analyse_core.analyser_lot(df_pointage, contexte['gps'], affectations(contexte))
+        return resultats, len(resultats)
+
+    def analyse_par_employe(contexte):
+        # Ancienne interface, un appel par employé
+        lignes = 0
+        for nom, plaque in affectations(contexte).items():
+            lignes += len(analyse_core.analyser_donnees(contexte['pointage'][nom], contexte['gps'][plaque], nom, plaque))
+        return None, lignes
+
+    def resume_par_employe(contexte):
+        groupes = contexte['analyse'].groupby('nom_employe', observed=True)
+        return {nom: resume_ecart.generer_resume(groupe) for nom, groupe in groupes}, groupes.ngroups
+
+    def resumes(contexte):
+        tidy = resume_ecart.generer_resumes(contexte['analyse'])
+        return tidy, len(tidy)
+
+    return [
+        ('pointage', pointage),
+        ('gps', gps),
+        ('analyse', analyse),
+        ('analyse_par_employe', analyse_par_employe),
+        ('resume_par_employe', resume_par_employe),
+        ('resumes', resumes),
+    ]
+
+
+def mesurer(liste_etapes, repetitions):
+    """Temps (s) de chaque répétition et pic mémoire (octets) de chaque étape."""
+    temps = {nom: [] for nom, _ in liste_etapes}
+    lignes, pics = {}, {}
+    for _ in range(repetitions):
+        contexte = {}
+        for nom, fonction in liste_etapes:
+            debut = time.perf_counter()
+            contexte[nom], lignes[nom] = fonction(contexte)
+            temps[nom].append(time.perf_counter() - debut)
+
+    contexte = {}
+    for nom, fonction in liste_etapes:
+        tracemalloc.start()
+        contexte[nom], _ = fonction(contexte)
+        pics[nom] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        nom: {
+            'secondes': statistics.median(temps[nom]),
+            'secondes_min': min(temps[nom]),
+            'pic_memoire_mo': pics[nom] / 1024 / 1024,
+            'lignes': int(lignes[nom]),
+        }
+        for nom, _ in liste_etapes
+    }
+
+
+def comparer(mesures, reference, tolerance):
+    """Étapes plus lentes que la référence de plus de `tolerance` (fraction), avec leur ratio."""
+    regressions = {}
+    for nom, mesure in mesures.items():
+        ancienne = reference.get('etapes', {}).get(nom)
+        if not ancienne or ancienne['secondes'] < DUREE_MIN_COMPARAISON:
+            continue
+        ratio = mesure['secondes'] / ancienne['secondes']
+        if ratio > 1 + tolerance:
+            regressions[nom] = ratio
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employes', type=int, default=40)
+    parser.add_argument('--camions', type=int, default=20)
+    parser.add_argument('--mois', type=int, default=1)
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--dossier', help="dossier des classeurs générés (par défaut un dossier temporaire)")
+    parser.add_argument('--sortie', default='mesures.json', help="fichier JSON des mesures")
+    parser.add_argument('--reference', help="mesures JSON précédentes à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="ralentissement toléré par étape par rapport à la référence (0.25 = 25 %%)")
+    args = parser.parse_args()
+
+    # Les avertissements de dépréciation de pandas ne doivent pas se mêler aux mesures
+    warnings.simplefilter('ignore', FutureWarning)
+    dossier = args.dossier or tempfile.mkdtemp(prefix='bench_')
+    debut = time.perf_counter()
+    chemins_pointage, chemins_gps = generer_entrees(dossier, args.employes, args.camions, args.mois, args.graine)
+    print(f"{len(chemins_pointage)} classeur(s) de pointage et {len(chemins_gps)} classeur(s) GPS "
+          f"générés dans {dossier} en {time.perf_counter() - debut:.1f} s")
+
+    mesures = mesurer(etapes(chemins_pointage, chemins_gps), args.repetitions)
+    print(f"{'étape':<22}{'médiane (ms)':>14}{'min (ms)':>12}{'pic mém. (Mo)':>15}{'lignes':>10}")
+    for nom, mesure in mesures.items():
+        print(f"{nom:<22}{mesure['secondes'] * 1000:>14.1f}{mesure['secondes_min'] * 1000:>12.1f}"
+              f"{mesure['pic_memoire_mo']:>15.2f}{mesure['lignes']:>10}")
+
+    rapport = {
+        'parametres': {'employes': args.employes, 'camions': args.camions, 'mois': args.mois,
+                       'repetitions': args.repetitions, 'graine': args.graine},
+        'environnement': {'python': platform.python_version(), 'pandas': pd.__version__,
+                          'plateforme': platform.platform()},
+        'etapes': mesures,
+    }
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    print(f"Mesures écrites dans {args.sortie}")
+
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as f:
+            reference = json.load(f)
+        donnees = ('employes', 'camions', 'mois', 'graine')
+        if any(reference.get('parametres', {}).get(cle) != rapport['parametres'][cle] for cle in donnees):
+            print("Attention : la référence n'a pas été mesurée avec les mêmes paramètres.", file=sys.stderr)
+        regressions = comparer(mesures, reference, args.tolerance)
+        for nom, ratio in regressions.items():
+            print(f"RÉGRESSION : {nom} x{ratio:.2f} par rapport à {args.reference}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# cache_lecture.py
+
+"""
+Cache disque des classeurs Excel déjà analysés par analyse_core.
+
+Chaque fichier d'entrée est identifié par son chemin, sa taille et sa date de
+modification (ou par le hash de son contenu) ; le résultat de sa lecture est
+stocké en Parquet quand pyarrow est disponible, en pickle sinon. Le cache est
+limité en taille : les entrées les moins récemment utilisées sont supprimées.
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+
+# À incrémenter quand le format des données produites par les lecteurs change
+VERSION_FORMAT = 2
+TAILLE_MAX_DEFAUT = 500 * 1024 * 1024
+
+
+# pandas et pyarrow ne sont importés qu'à la première lecture/écriture, pour ne pas
+# ralentir le démarrage de l'interface qui crée le cache dès l'ouverture.
+@functools.lru_cache(maxsize=None)
+def parquet_disponible():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def dossier_cache_defaut():
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(base, 'Pointage_HCP', 'cache')
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pointage_hcp')
+
+
+def hash_contenu(file_path, taille_bloc=1024 * 1024):
+    h = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+class CacheLecture:
+    """
+    Cache des lectures de fichiers, à passer aux chargeurs d'analyse_core.
+    actif=False désactive le cache (ni lecture ni écriture) sans changer l'appelant.
+    par_contenu=True identifie les fichiers par le hash de leur contenu plutôt
+    que par taille + date de modification.
+    """
+
+    def __init__(self, dossier=None, taille_max=TAILLE_MAX_DEFAUT, actif=True, par_contenu=False):
+        self.dossier = dossier or dossier_cache_defaut()
+        self.taille_max = taille_max
+        self.actif = actif
+        self.par_contenu = par_contenu
+
+    def cle(self, file_path, type_lecture):
+        """Clé d'un fichier pour un type de lecture donné ('pointage', 'gps', ...)."""
+        if self.par_contenu:
+            empreinte = hash_contenu(file_path)
+        else:
+            stat = os.stat(file_path)
+            empreinte = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha1(f"{VERSION_FORMAT}|{type_lecture}|{empreinte}".encode('utf-8')).hexdigest()
+
+    def _chemins(self, cle):
+        base = os.path.join(self.dossier, cle)
+        return base + '.parquet', base + '.pkl'
+
+    def lire(self, cle):
+        """Retourne l'objet en cache pour `cle`, ou None."""
+        if not self.actif:
+            return None
+        import pandas as pd
+        for chemin in self._chemins(cle):
+            if not os.path.exists(chemin):
+                continue
+            try:
+                if chemin.endswith('.parquet'):
+                    objet = pd.read_parquet(chemin)
+                else:
+                    with open(chemin, 'rb') as f:
+                        objet = pickle.load(f)
+            except Exception:
+                # Entrée corrompue ou illisible : on la supprime et on relit le fichier source
+                self._supprimer(chemin)
+                continue
+            # Mise à jour de la date d'accès pour l'éviction LRU
+            os.utime(chemin)
+            return objet
+        return None
+
+    def ecrire(self, cle, objet):
+        """Stocke `objet` sous `cle` puis applique la limite de taille."""
+        if not self.actif:
+            return
+        import pandas as pd
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin_parquet, chemin_pickle = self._chemins(cle)
+        if parquet_disponible() and isinstance(objet, pd.DataFrame):
+            try:
+                self._ecrire_atomique(chemin_parquet, lambda f: objet.to_parquet(f))
+                self.evincer()
+                return
+            except Exception:
+                # Colonnes de types mélangés non supportées par Parquet : repli sur pickle
+                pass
+        self._ecrire_atomique(chemin_pickle, lambda f: pickle.dump(objet, f, protocol=pickle.HIGHEST_PROTOCOL))
+        self.evincer()
+
+    def _ecrire_atomique(self, chemin, ecriture):
+        fd, chemin_tmp = tempfile.mkstemp(dir=self.dossier, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                ecriture(f)
+            os.replace(chemin_tmp, chemin)
+        except Exception:
+            self._supprimer(chemin_tmp)
+            raise
+
+    def _entrees(self):
+        if not os.path.isdir(self.dossier):
+            return []
+        entrees = []
+        for nom in os.listdir(self.dossier):
+            if not nom.endswith(('.parquet', '.pkl')):
+                continue
+            chemin = os.path.join(self.dossier, nom)
+            try:
+                stat = os.stat(chemin)
+            except OSError:
+                continue
+            entrees.append((stat.st_mtime, stat.st_size, chemin))
+        return entrees
+
+    def taille(self):
+        return sum(taille for _, taille, _ in self._entrees())
+
+    def evincer(self):
+        """Supprime les entrées les moins récemment utilisées jusqu'à passer sous taille_max."""
+        entrees = sorted(self._entrees())
+        total = sum(taille for _, taille, _ in entrees)
+        for _, taille, chemin in entrees:
+            if total <= self.taille_max:
+                break
+            self._supprimer(chemin)
+            total -= taille
+
+    def vider(self):
+        for _, _, chemin in self._entrees():
+            self._supprimer(chemin)
+
+    @staticmethod
+    def _supprimer(chemin):
+        try:
+            os.remove(chemin)
+        except OSError:
+            pass
@@ -0,0 +1,140 @@
+# export_resultats.py
+
+"""
+Export des résultats d'analyse (analyse_core.analyser_lot) et des résumés
+(resume_ecart.generer_resumes) pour la paie : classeur Excel à plusieurs feuilles,
+CSV ou Parquet. Les durées sont écrites en minutes, plus simples à additionner
+dans un tableur qu'un format horaire (et les écarts peuvent être négatifs).
+
+Le classeur est écrit avec openpyxl en mode write_only : les lignes sont envoyées
+au fichier au fur et à mesure, la mémoire utilisée ne dépend pas du nombre de lignes.
+"""
+
+import os
+
+import pandas as pd
+
+from instrumentation import mesure
+
+FORMATS_EXPORT = ('.xlsx', '.csv', '.parquet')
+
+# Noms des feuilles du classeur, et suffixes des fichiers CSV / Parquet
+TABLES_EXPORT = {
+    'resultats': "Détail par jour",
+    'resume_semaine': "Résumé par semaine",
+    'resume_mois': "Résumé par mois",
+}
+TAILLE_BLOC_EXPORT = 5000
+
+
+def durees_en_minutes(df):
+    """Remplace les colonnes timedelta par leur valeur en minutes, arrondie au centième."""
+    df = df.copy()
+    for colonne in df.columns:
+        if pd.api.types.is_timedelta64_dtype(df[colonne]):
+            df[colonne] = (df[colonne].dt.total_seconds() / 60).round(2)
+    return df
+
+
+def tables_export(resultats, resumes):
+    """Tables à exporter, {nom: DataFrame}, dans l'ordre des feuilles."""
+    tables = {'resultats': durees_en_minutes(resultats)}
+    for nom, periode in (('resume_semaine', 'semaine'), ('resume_mois', 'mois')):
+        tables[nom] = resumes[resumes['periode'] == periode].drop(columns='periode').round(2)
+    return tables
+
+
+def _valeurs_python(colonne):
+    """Valeurs d'une colonne en objets Python acceptés par openpyxl (None pour NaN/NaT)."""
+    # Les Timestamp pandas sont des datetime, openpyxl les écrit comme dates Excel
+    valeurs = colonne.astype(object).to_numpy()
+    valeurs[colonne.isna().to_numpy()] = None
+    return valeurs
+
+
+def ecrire_xlsx(chemin, tables, progression=None):
+    """Écrit chaque table dans sa feuille, par blocs de lignes (openpyxl write_only)."""
+    # Fichier ouvert avant d'écrire les feuilles : un chemin invalide échoue tout de suite
+    with open(chemin, 'wb') as fichier:
+        _ecrire_classeur(fichier, tables, progression)
+
+
+def _ecrire_classeur(fichier, tables, progression):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    total = sum(len(df) for df in tables.values())
+    fait = 0
+    for nom, df in tables.items():
+        ws = wb.create_sheet(TABLES_EXPORT.get(nom, nom)[:31])
+        ws.freeze_panes = 'A2'
+        en_tetes = []
+        for colonne in df.columns:
+            cellule = WriteOnlyCell(ws, value=str(colonne))
+            cellule.font = Font(bold=True)
+            en_tetes.append(cellule)
+        ws.append(en_tetes)
+        for debut in range(0, len(df), TAILLE_BLOC_EXPORT):
+            bloc = df.iloc[debut:debut + TAILLE_BLOC_EXPORT]
+            for ligne in zip(*(_valeurs_python(bloc[colonne]) for colonne in bloc.columns)):
+                ws.append(ligne)
+            fait += len(bloc)
+            if progression is not None:
+                progression(fait, total, TABLES_EXPORT.get(nom, nom))
+    wb.save(fichier)
+
+
+def _ecrire_tables(chemins, tables, extension, progression=None):
+    for i, (nom, df) in enumerate(tables.items()):
+        if extension == '.csv':
+            df.to_csv(chemins[nom], sep=';', index=False, encoding='utf-8-sig')
+        else:
+            try:
+                df.to_parquet(chemins[nom], index=False)
+            except ImportError as e:
+                raise ValueError("L'export Parquet nécessite le paquet pyarrow.") from e
+        if progression is not None:
+            progression(i + 1, len(tables), TABLES_EXPORT[nom])
+    return list(chemins.values())
+
+
+def _verifier_format(extension, chemin):
+    if extension not in FORMATS_EXPORT:
+        raise ValueError(f"Format d'export non pris en charge : {extension or chemin} "
+                         f"(formats possibles : {', '.join(FORMATS_EXPORT)})")
+
+
+@mesure("Export")
+def exporter_resultats(chemin, resultats, resumes, progression=None):
+    """
+    Exporte résultats et résumés selon l'extension de `chemin` :
+    - .xlsx : un classeur, une feuille par table ;
+    - .csv / .parquet : un fichier par table, nommé <chemin sans extension>_<table>.<ext>.
+    Retourne la liste des fichiers écrits.
+    """
+    base, extension = os.path.splitext(chemin)
+    extension = extension.lower()
+    _verifier_format(extension, chemin)
+    tables = tables_export(resultats, resumes)
+    if extension == '.xlsx':
+        ecrire_xlsx(chemin, tables, progression)
+        return [chemin]
+    return _ecrire_tables({nom: f"{base}_{nom}{extension}" for nom in tables}, tables, extension, progression)
+
+
+@mesure("Export")
+def exporter_dossier(dossier, resultats, resumes, extension='.csv'):
+    """
+    Variante pour les traitements automatiques : écrit dans `dossier` resultats.xlsx,
+    ou un fichier par table (resultats.csv, resume_semaine.csv, resume_mois.csv, ou .parquet).
+    """
+    _verifier_format(extension, dossier)
+    os.makedirs(dossier, exist_ok=True)
+    tables = tables_export(resultats, resumes)
+    if extension == '.xlsx':
+        chemin = os.path.join(dossier, 'resultats.xlsx')
+        ecrire_xlsx(chemin, tables)
+        return [chemin]
+    return _ecrire_tables({nom: os.path.join(dossier, nom + extension) for nom in tables}, tables, extension)
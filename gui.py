@@ -1,21 +1,35 @@
 # gui.py
 
 import sys
-import pandas as pd
+import os
+import multiprocessing
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QFileDialog, QButtonGroup, QFrame, QStackedWidget,
-    QTextEdit, QTableWidget, QTableWidgetItem, QHeaderView, QLabel,
-    QScrollArea, QComboBox, QGridLayout
+    QTextEdit, QTableView, QHeaderView, QLabel,
+    QComboBox, QGridLayout, QProgressBar, QDateEdit, QMessageBox
 )
 # --- AJOUT: Importer pyqtSignal pour la communication entre widgets ---
-from PyQt6.QtCore import Qt, QRect, QPropertyAnimation, QEasingCurve, QTimer, pyqtSignal
-from PyQt6.QtGui import QFont, QFontMetrics, QAction
+from PyQt6.QtCore import (
+    Qt, QRect, QPropertyAnimation, QEasingCurve, QTimer, pyqtSignal, QObject, QThread,
+    QAbstractTableModel, QModelIndex, QDate, QSettings
+)
+from PyQt6.QtGui import QFont, QFontMetrics, QAction, QTextCursor
+
+from cache_lecture import CacheLecture, hash_contenu
+from historique import HistoriqueAnalyses
+from instrumentation import mesures
+
+# pandas, analyse_core et resume_ecart ne sont importés qu'au premier usage (chargement
+# ou analyse, dans le thread de travail) pour que la fenêtre s'affiche sans les attendre.
 
-import analyse_core
-import resume_ecart
+# Nombre de processus utilisés pour lire les classeurs Excel en parallèle
+NB_PROCESSUS_CHARGEMENT = max(1, (os.cpu_count() or 1) - 1)
+# Taille maximale des groupes d'employés analysés ensemble (1, 4, 16... jusqu'à cette taille)
+TAILLE_MAX_GROUPE_ANALYSE = 128
 
 def format_timedelta_display(td):
+    import pandas as pd
     if pd.isna(td): return "N/A"
     total_seconds = int(td.total_seconds())
     sign = '-' if total_seconds < 0 else ''
@@ -24,9 +38,67 @@ def format_timedelta_display(td):
     minutes, seconds = divmod(remainder, 60)
     return f"{sign}{hours:02}:{minutes:02}:{seconds:02}"
 
+SEPARATEUR_RAPPORTS = "\n\n" + "#"*60 + "\n\n"
+
+def _longueur_qt(texte):
+    """Longueur d'un texte en positions de QTextDocument (unités UTF-16, les emojis en comptent deux)."""
+    return len(texte.encode('utf-16-le')) // 2
+
+LONGUEUR_SEPARATEUR = _longueur_qt(SEPARATEUR_RAPPORTS)
+
+def _signature_fichier(file_path):
+    """(taille, date de modification en ns) d'un fichier, comme la clé de CacheLecture, sans lire son contenu."""
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+class TraitementAnnule(Exception):
+    pass
+
+class TravailArrierePlan(QObject):
+    """
+    Exécute `fonction(travail)` dans un QThread. La fonction signale son avancement
+    avec travail.signaler_progression(), qui lève TraitementAnnule si l'utilisateur
+    a demandé l'annulation, et peut publier des résultats intermédiaires via resultat_partiel.
+    Entre deux étapes longues sans avancement à signaler, travail.verifier_annulation()
+    lève seulement TraitementAnnule.
+    """
+    progression = pyqtSignal(int, int, str)
+    resultat_partiel = pyqtSignal(object)
+    termine = pyqtSignal(object)
+    erreur = pyqtSignal(str)
+    annule = pyqtSignal()
+
+    def __init__(self, fonction):
+        super().__init__()
+        self._fonction = fonction
+        self._annulation_demandee = False
+
+    def demander_annulation(self):
+        self._annulation_demandee = True
+
+    def verifier_annulation(self):
+        if self._annulation_demandee:
+            raise TraitementAnnule()
+
+    def signaler_progression(self, fait, total, libelle=""):
+        self.verifier_annulation()
+        self.progression.emit(fait, total, libelle)
+
+    def run(self):
+        try:
+            resultat = self._fonction(self)
+        except TraitementAnnule:
+            self.annule.emit()
+            return
+        except Exception as e:
+            self.erreur.emit(str(e))
+            return
+        self.termine.emit(resultat)
+
 class DetailsPageWidget(QWidget):
     # --- AJOUT: Signal pour notifier la fenêtre principale de lancer l'analyse ---
     analyse_requested = pyqtSignal()
+    association_auto_requested = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -37,17 +109,29 @@ class DetailsPageWidget(QWidget):
         self.mapping_frame.hide()
         self.main_layout.addWidget(self.mapping_frame)
         self.employee_truck_combos = {}
+        # Rapports affichés, dans l'ordre du document : [nom_employe, cle, longueur du texte (_longueur_qt)]
+        self._sections = []
         self.details_display = QTextEdit()
         self.details_display.setReadOnly(True)
+        self.details_display.setUndoRedoEnabled(False)
         self.details_display.setFont(QFont("Calibri", 15))
         self.main_layout.addWidget(self.details_display)
         self.display_message("👋 Bienvenue ! Chargez les fichiers de pointage et GPS pour commencer.")
 
     def setup_truck_mapping_ui(self, employee_names, truck_plates):
+        # Les associations déjà faites sont conservées si l'employé et le camion existent encore
+        associations = self.get_truck_assignments()
         while self.mapping_layout.count():
             child = self.mapping_layout.takeAt(0)
             if child.widget():
                 child.widget().deleteLater()
+            elif child.layout():
+                # Grille des associations, boutons : leurs widgets appartiennent au cadre
+                sous_layout = child.layout()
+                while sous_layout.count():
+                    item = sous_layout.takeAt(0)
+                    if item.widget():
+                        item.widget().deleteLater()
         self.employee_truck_combos.clear()
         
         title = QLabel("Associer un camion à chaque employé pour l'analyse :")
@@ -62,6 +146,8 @@ class DetailsPageWidget(QWidget):
             label.setFont(QFont("Calibri", 15))
             combo = QComboBox()
             combo.addItems(options)
+            if associations.get(name) in options:
+                combo.setCurrentText(associations[name])
             combo.setFixedWidth(200)
             grid.addWidget(label, i, 0)
             grid.addWidget(combo, i, 1)
@@ -85,12 +171,31 @@ class DetailsPageWidget(QWidget):
         """)
         # On connecte le clic du bouton à l'émission de notre signal personnalisé
         self.lancer_analyse_button.clicked.connect(self.analyse_requested.emit)
-        self.mapping_layout.addWidget(self.lancer_analyse_button)
         # --- FIN DE L'AJOUT ---
 
+        # Propose les associations d'après la concordance des horaires pointage / GPS
+        self.association_auto_button = QPushButton("Associer automatiquement")
+        self.association_auto_button.setFont(QFont("Calibri", 15))
+        self.association_auto_button.setFixedWidth(260)
+        self.association_auto_button.setStyleSheet("QPushButton { padding: 8px; margin-top: 10px; }")
+        self.association_auto_button.clicked.connect(self.association_auto_requested.emit)
+
+        boutons = QHBoxLayout()
+        boutons.addWidget(self.lancer_analyse_button)
+        boutons.addWidget(self.association_auto_button)
+        boutons.addStretch()
+        self.mapping_layout.addLayout(boutons)
+
         self.mapping_frame.show()
         self.display_message("Veuillez effectuer les associations puis cliquer sur le bouton \"Lancer l'analyse\".")
 
+    def appliquer_associations(self, affectations):
+        """Sélectionne dans chaque liste le camion proposé ; les autres employés ne sont pas modifiés."""
+        for name, plaque in affectations.items():
+            combo = self.employee_truck_combos.get(name)
+            if combo is not None and combo.findText(plaque) >= 0:
+                combo.setCurrentText(plaque)
+
     def get_truck_assignments(self):
         assignments = {}
         for name, combo in self.employee_truck_combos.items():
@@ -99,148 +204,379 @@ class DetailsPageWidget(QWidget):
 
     def clear_display(self):
         self.details_display.clear()
+        self._sections = []
         self.mapping_frame.hide()
 
     def display_message(self, message):
         self.details_display.setText(message)
+        self._sections = []
 
-    def afficher_rapport(self, resultats, nom_employe, plaque_camion, append=False):
-        if not resultats: return
+    def rapports_affiches(self):
+        return [nom for nom, _, _ in self._sections]
 
-        header = f"👤 Employé : {nom_employe}\n"
-        header += f"🚚 Camion assigné : {plaque_camion}\n"
-        header += "="*50 + "\n\n"
-        
-        body = ""
-        for res in sorted(resultats, key=lambda x: x['date']):
-            body += f"--- Journée du {res['date']:%d/%m/%Y} ---\n"
-            body += f"Pointage         : {res['pointage_debut']:%H:%M} - {res['pointage_fin']:%H:%M}\n"
-            body += f"Temps de travail : {format_timedelta_display(res.get('temps_travail', pd.NaT))}\n"
-            body += f"Temps de pause   : {format_timedelta_display(res.get('temps_pause', pd.NaT))}\n"
-            arrivee = res['gps_arrivee'].strftime('%H:%M') if pd.notna(res['gps_arrivee']) else 'N/A'
-            depart = res['gps_depart'].strftime('%H:%M') if pd.notna(res['gps_depart']) else 'N/A'
-            body += f"GPS (Arr/Dep)    : {arrivee} - {depart}\n"
-            body += f"  -> Ecart Matin   : {format_timedelta_display(res['ecart_matin'])}\n"
-            body += f"  -> Ecart Soir    : {format_timedelta_display(res['ecart_soir'])}\n\n"
-        
-        full_report = header + body
-
-        if append:
-            current_text = self.details_display.toPlainText()
-            messages_a_effacer = ["Veuillez effectuer les associations", "Bienvenue", "Analyse en cours..."]
-            if any(msg in current_text for msg in messages_a_effacer):
-                current_text = ""
-            separator = "\n\n" + "#"*60 + "\n\n" if current_text else ""
-            self.details_display.setText(current_text + separator + full_report)
+    def afficher_rapport(self, resultats, nom_employe, plaque_camion, cle=None):
+        """
+        Affiche ou remplace la section d'un employé ; resultats est le DataFrame de ses
+        jours analysés (analyse_core.analyser_lot). Les sections restent triées par nom
+        et seule celle de l'employé est réécrite. Si la section affichée a déjà la même
+        clé (mêmes données, même camion), rien n'est fait.
+        """
+        noms = self.rapports_affiches()
+        if nom_employe in noms and cle is not None and self._sections[noms.index(nom_employe)][1] == cle:
+            return
+        if resultats.empty:
+            self.retirer_rapport(nom_employe)
+            return
+        import pandas as pd
+
+        lignes = [
+            f"👤 Employé : {nom_employe}\n",
+            f"🚚 Camion assigné : {plaque_camion}\n",
+            "="*50 + "\n\n",
+        ]
+        for res in resultats.sort_values('date').itertuples(index=False):
+            arrivee = res.gps_arrivee.strftime('%H:%M') if pd.notna(res.gps_arrivee) else 'N/A'
+            depart = res.gps_depart.strftime('%H:%M') if pd.notna(res.gps_depart) else 'N/A'
+            lignes.extend((
+                f"--- Journée du {res.date:%d/%m/%Y} ---\n",
+                f"Pointage         : {res.pointage_debut:%H:%M} - {res.pointage_fin:%H:%M}\n",
+                f"Temps de travail : {format_timedelta_display(res.temps_travail)}\n",
+                f"Temps de pause   : {format_timedelta_display(res.temps_pause)}\n",
+                f"GPS (Arr/Dep)    : {arrivee} - {depart}\n",
+            ))
+            if res.plaque_camion != plaque_camion:
+                # Journée passée sur un autre camion (planning de l'association automatique)
+                lignes.append(f"Camion du jour   : {res.plaque_camion}\n")
+            lignes.extend((
+                f"  -> Ecart Matin   : {format_timedelta_display(res.ecart_matin)}\n",
+                f"  -> Ecart Soir    : {format_timedelta_display(res.ecart_soir)}\n\n",
+            ))
+        full_report = "".join(lignes)
+        longueur = _longueur_qt(full_report)
+
+        if nom_employe in noms:
+            i = noms.index(nom_employe)
+            debut = self._position_section(i)
+            self._remplacer_texte(debut, debut + self._sections[i][2], full_report)
+            self._sections[i][1:] = [cle, longueur]
+        elif not self._sections:
+            # Premier rapport : il remplace le message d'accueil ou d'attente
+            self.details_display.setPlainText(full_report)
+            self._sections.append([nom_employe, cle, longueur])
+        else:
+            i = sum(1 for nom in noms if nom < nom_employe)
+            if i < len(noms):
+                debut = self._position_section(i)
+                self._remplacer_texte(debut, debut, full_report + SEPARATEUR_RAPPORTS)
+            else:
+                fin = self.details_display.document().characterCount() - 1
+                self._remplacer_texte(fin, fin, SEPARATEUR_RAPPORTS + full_report)
+            self._sections.insert(i, [nom_employe, cle, longueur])
+
+    def retirer_rapport(self, nom_employe):
+        noms = self.rapports_affiches()
+        if nom_employe not in noms: return
+        i = noms.index(nom_employe)
+        if len(noms) == 1:
+            self.details_display.clear()
+            del self._sections[i]
+            return
+        debut = self._position_section(i)
+        fin = debut + self._sections[i][2]
+        # Le séparateur retiré est celui qui suit la section, ou celui qui précède la dernière
+        if i < len(noms) - 1:
+            fin += LONGUEUR_SEPARATEUR
         else:
-            self.details_display.setText(full_report)
+            debut -= LONGUEUR_SEPARATEUR
+        self._remplacer_texte(debut, fin, "")
+        del self._sections[i]
+
+    def _position_section(self, i):
+        """Position dans le document du début de la i-ème section, d'après les longueurs mémorisées : aucun texte n'est réencodé."""
+        return sum(longueur for _, _, longueur in self._sections[:i]) + i * LONGUEUR_SEPARATEUR
+
+    def _remplacer_texte(self, debut, fin, texte):
+        cursor = QTextCursor(self.details_display.document())
+        cursor.setPosition(debut)
+        cursor.setPosition(fin, QTextCursor.MoveMode.KeepAnchor)
+        cursor.insertText(texte)
+
+
+class ResumeTableModel(QAbstractTableModel):
+    """
+    Modèle de table des résumés de tous les employés. La colonne 0 contient le nom
+    de l'employé ; set_filtre() restreint les lignes visibles à un seul employé.
+    Les textes sont formatés une fois à l'ajout, data() ne fait qu'un accès par index.
+    """
+
+    def __init__(self, en_tetes, parent=None):
+        super().__init__(parent)
+        self._en_tetes = ["Employé"] + list(en_tetes)
+        self._lignes = []
+        self._lignes_par_employe = {}
+        self._filtre = None
+        self._visibles = self._lignes
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._visibles)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._en_tetes)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self._visibles[index.row()][index.column()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self._en_tetes[section]
+        return None
+
+    def _debut_employe(self, nom_employe):
+        """Indice de la première ligne de l'employé dans _lignes (les lignes sont groupées par employé)."""
+        debut = 0
+        for nom, lignes in self._lignes_par_employe.items():
+            if nom == nom_employe:
+                break
+            debut += len(lignes)
+        return debut
+
+    def ajouter_lignes(self, nom_employe, lignes):
+        if not lignes: return
+        if nom_employe not in self._lignes_par_employe:
+            # Les lignes restent groupées par employé, dans l'ordre alphabétique
+            self._lignes_par_employe[nom_employe] = []
+            self._lignes_par_employe = dict(sorted(self._lignes_par_employe.items()))
+        lignes_employe = self._lignes_par_employe[nom_employe]
+        fin = self._debut_employe(nom_employe) + len(lignes_employe)
+        if self._filtre is None:
+            self.beginInsertRows(QModelIndex(), fin, fin + len(lignes) - 1)
+        elif self._filtre == nom_employe:
+            self.beginInsertRows(QModelIndex(), len(lignes_employe), len(lignes_employe) + len(lignes) - 1)
+        self._lignes[fin:fin] = lignes
+        lignes_employe.extend(lignes)
+        if self._filtre is None or self._filtre == nom_employe:
+            self.endInsertRows()
+
+    def retirer_lignes(self, nom_employe):
+        lignes_employe = self._lignes_par_employe.get(nom_employe)
+        if not lignes_employe: return
+        debut = self._debut_employe(nom_employe)
+        if self._filtre is None:
+            self.beginRemoveRows(QModelIndex(), debut, debut + len(lignes_employe) - 1)
+        elif self._filtre == nom_employe:
+            self.beginRemoveRows(QModelIndex(), 0, len(lignes_employe) - 1)
+        del self._lignes[debut:debut + len(lignes_employe)]
+        # Vidée sur place : la vue filtrée sur cet employé partage cette liste
+        del lignes_employe[:]
+        if self._filtre is None or self._filtre == nom_employe:
+            self.endRemoveRows()
+
+    def remplacer_lignes(self, nom_employe, lignes):
+        self.retirer_lignes(nom_employe)
+        self.ajouter_lignes(nom_employe, lignes)
+
+    def set_filtre(self, nom_employe=None):
+        self.beginResetModel()
+        self._filtre = nom_employe
+        if nom_employe is None:
+            self._visibles = self._lignes
+        else:
+            self._visibles = self._lignes_par_employe.setdefault(nom_employe, [])
+        self.endResetModel()
+
+    def vider(self):
+        self.beginResetModel()
+        self._lignes = []
+        self._lignes_par_employe = {}
+        self._filtre = None
+        self._visibles = self._lignes
+        self.endResetModel()
+
+
+def _minutes_en_texte(minutes):
+    import pandas as pd
+    return [format_timedelta_display(td) for td in pd.to_timedelta(minutes, unit='m')]
 
 
 class ResumePageWidget(QWidget):
+    TOUS_LES_EMPLOYES = "Tous les employés"
+    # Période demandée (datetime.date de début et de fin, incluses) pour les résumés de l'historique
+    historique_requested = pyqtSignal(object, object)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(5, 5, 5, 5)
+        self._setup_historique_ui()
         self.employee_selector = QComboBox()
         self.employee_selector.setFont(QFont("Calibri", 15))
         self.employee_selector.setFixedWidth(200)
         self.employee_selector.currentIndexChanged.connect(self.update_summary_view)
         self.main_layout.addWidget(self.employee_selector)
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setStyleSheet("QScrollArea { border: none; }")
-        self.scroll_content = QWidget()
-        self.content_layout = QVBoxLayout(self.scroll_content)
-        self.content_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.scroll_area.setWidget(self.scroll_content)
-        self.main_layout.addWidget(self.scroll_area)
-        self.employee_summaries = {}
-        self.is_first_summary = True
+
+        self.initial_label = QLabel("Lancez une analyse pour voir les résumés.")
+        self.initial_label.setFont(QFont("Calibri", 14, QFont.Weight.Bold))
+        self.initial_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.main_layout.addWidget(self.initial_label)
+
+        # Un seul jeu de vues pour tous les employés, filtré par employee_selector
+        self.content_widget = QWidget()
+        content_layout = QVBoxLayout(self.content_widget)
+        content_layout.setContentsMargins(0, 0, 0, 0)
+        self.stats_label = QLabel()
+        self.stats_label.setFont(QFont("Calibri", 14, QFont.Weight.Bold))
+        content_layout.addWidget(self.stats_label)
+        self.semaine_model = ResumeTableModel(["Semaine du", "Moyenne Écart matin", "Moyenne Écart soir"], self)
+        self.mois_model = ResumeTableModel(["Mois de", "Moyenne Écart matin", "Moyenne Écart soir",
+                                            "Total écart matin", "Total écart soir"], self)
+        table_font = QFont("Calibri", 11)
+        content_layout.addWidget(QLabel("Moyennes par semaine :"))
+        self.semaine_view = self._creer_vue(self.semaine_model, table_font)
+        content_layout.addWidget(self.semaine_view, 2)
+        content_layout.addWidget(QLabel("Moyennes & totaux par mois :"))
+        self.mois_view = self._creer_vue(self.mois_model, table_font)
+        content_layout.addWidget(self.mois_view, 1)
+        self.main_layout.addWidget(self.content_widget)
+
+        self.employee_stats = {}
+        self._cles = {}
         self.clear_display()
 
+    def _setup_historique_ui(self):
+        historique_layout = QHBoxLayout()
+        historique_layout.addWidget(QLabel("Historique du"))
+        aujourd_hui = QDate.currentDate()
+        self.historique_debut = QDateEdit(aujourd_hui.addMonths(-6))
+        self.historique_fin = QDateEdit(aujourd_hui)
+        for date_edit in (self.historique_debut, self.historique_fin):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("dd/MM/yyyy")
+        historique_layout.addWidget(self.historique_debut)
+        historique_layout.addWidget(QLabel("au"))
+        historique_layout.addWidget(self.historique_fin)
+        self.historique_button = QPushButton("Afficher l'historique")
+        self.historique_button.clicked.connect(self._demander_historique)
+        historique_layout.addWidget(self.historique_button)
+        historique_layout.addStretch()
+        # Origine des résumés affichés : dernière analyse ou historique sur une période
+        self.source_label = QLabel()
+        historique_layout.addWidget(self.source_label)
+        self.main_layout.addLayout(historique_layout)
+
+    def _demander_historique(self):
+        debut, fin = self.historique_debut.date().toPyDate(), self.historique_fin.date().toPyDate()
+        if debut > fin:
+            debut, fin = fin, debut
+        self.historique_requested.emit(debut, fin)
+
+    def set_source(self, texte):
+        self.source_label.setText(texte)
+
+    @staticmethod
+    def _creer_vue(model, font):
+        view = QTableView()
+        view.setModel(model)
+        view.setFont(font)
+        view.verticalHeader().hide()
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        return view
+
     def clear_display(self):
-        while self.content_layout.count():
-            child = self.content_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-        self.employee_summaries.clear()
+        self.employee_stats.clear()
+        self._cles.clear()
+        self.semaine_model.vider()
+        self.mois_model.vider()
+        self.employee_selector.blockSignals(True)
         self.employee_selector.clear()
+        self.employee_selector.blockSignals(False)
         self.employee_selector.hide()
-        self.is_first_summary = True
-        self.initial_label = QLabel("Lancez une analyse pour voir les résumés.")
-        self.initial_label.setFont(QFont("Calibri", 14, QFont.Weight.Bold))
-        self.initial_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.content_layout.addWidget(self.initial_label)
+        self.content_widget.hide()
+        self.initial_label.show()
 
-    def afficher_resume(self, resumes, nom_employe, plaque_camion):
-        moyenne_semaine, moyenne_mois, total_mois, jours = resumes
-        if jours == 0: return
+    def afficher_resume(self, resume, nom_employe, plaque_camion, cle=None):
+        """
+        Ajoute ou remplace les lignes d'un employé ; resume est sa partie du tableau de
+        resume_ecart.generer_resumes. Si elles ont été produites avec la même clé
+        (mêmes données, même camion), rien n'est fait.
+        """
+        if cle is not None and nom_employe in self.employee_stats and self._cles.get(nom_employe) == cle:
+            return
+        semaines = resume[resume['periode'] == 'semaine']
+        mois = resume[resume['periode'] == 'mois']
+        jours = int(mois['nb_jours'].sum())
+        if jours == 0:
+            self.retirer_resume(nom_employe)
+            return
 
-        if self.is_first_summary:
-            self.is_first_summary = False
+        if not self.employee_stats:
             self.initial_label.hide()
-            self.employee_selector.addItem("Tous les employés")
+            self.content_widget.show()
+            self.employee_selector.addItem(self.TOUS_LES_EMPLOYES)
             self.employee_selector.show()
 
-        employee_frame = QFrame()
-        employee_frame.setFrameShape(QFrame.Shape.StyledPanel)
-        employee_layout = QVBoxLayout(employee_frame)
-        stats_label = QLabel(
-            f"👤 <b>{nom_employe}</b> | 🚚 <b>{plaque_camion}</b><br>"
-            f"Nombre de jours analysés (avec écarts) : {jours}"
-        )
-        stats_label.setFont(QFont("Calibri", 14, QFont.Weight.Bold))
-        employee_layout.addWidget(stats_label)
-        employee_layout.addWidget(QLabel("Moyennes par semaine :"))
-        semaine_table = QTableWidget()
-        employee_layout.addWidget(semaine_table)
-        employee_layout.addWidget(QLabel("Moyennes & totaux par mois :"))
-        mois_table = QTableWidget()
-        employee_layout.addWidget(mois_table)
-        table_font = QFont("Calibri", 11)
-        semaine_table.setFont(table_font)
-        mois_table.setFont(table_font)
-        self._remplir_table(semaine_table, moyenne_semaine, "Semaine du", "Moyenne")
-        self._remplir_table(mois_table, moyenne_mois, "Mois de", "Moyenne", total_mois)
-        self.employee_summaries[nom_employe] = employee_frame
-        self.content_layout.addWidget(employee_frame)
-        self.employee_selector.addItem(nom_employe)
+        if nom_employe not in self.employee_stats:
+            # Index 0 : "Tous les employés", puis les employés triés par nom
+            self.employee_selector.insertItem(1 + sum(1 for nom in self.employee_stats if nom < nom_employe), nom_employe)
+        self.employee_stats[nom_employe] = (plaque_camion, jours)
+        self._cles[nom_employe] = cle
+        self.semaine_model.remplacer_lignes(nom_employe, self._lignes_resume(nom_employe, semaines, '%Y-%m-%d'))
+        self.mois_model.remplacer_lignes(nom_employe, self._lignes_resume(nom_employe, mois, '%B %Y', totaux=True))
+        self._maj_statistiques()
+
+    def retirer_resume(self, nom_employe):
+        if nom_employe not in self.employee_stats: return
+        if len(self.employee_stats) == 1:
+            self.clear_display()
+            return
+        del self.employee_stats[nom_employe]
+        self._cles.pop(nom_employe, None)
+        self.semaine_model.retirer_lignes(nom_employe)
+        self.mois_model.retirer_lignes(nom_employe)
+        # Si l'employé retiré était sélectionné, le sélecteur passe à un autre et met la vue à jour
+        self.employee_selector.removeItem(self.employee_selector.findText(nom_employe))
+        self._maj_statistiques()
+
+    def resumes_affiches(self):
+        return list(self.employee_stats)
+
+    @staticmethod
+    def _lignes_resume(nom_employe, resume, format_periode, totaux=False):
+        if resume.empty:
+            return []
+        colonnes = [
+            [nom_employe] * len(resume),
+            list(resume['debut'].dt.strftime(format_periode)),
+            _minutes_en_texte(resume['ecart_matin_moyen']),
+            _minutes_en_texte(resume['ecart_soir_moyen']),
+        ]
+        if totaux:
+            colonnes.append(_minutes_en_texte(resume['ecart_matin_total']))
+            colonnes.append(_minutes_en_texte(resume['ecart_soir_total']))
+        return list(zip(*colonnes))
 
     def update_summary_view(self):
         selected_employee = self.employee_selector.currentText()
         if not selected_employee: return
-        for name, frame in self.employee_summaries.items():
-            is_visible = (selected_employee == "Tous les employés" or name == selected_employee)
-            frame.setVisible(is_visible)
+        filtre = None if selected_employee == self.TOUS_LES_EMPLOYES else selected_employee
+        self.semaine_model.set_filtre(filtre)
+        self.mois_model.set_filtre(filtre)
+        for view in (self.semaine_view, self.mois_view):
+            view.setColumnHidden(0, filtre is not None)
+        self._maj_statistiques()
 
-    def _remplir_table(self, table, df_moyenne, prefix, type_calcul, df_total=None):
-        if df_moyenne.empty:
-            table.hide()
-            return
-        df_moyenne.index = df_moyenne.index.strftime('%Y-%m-%d')
-        if 'Mois' in prefix:
-            df_moyenne.index = pd.to_datetime(df_moyenne.index).strftime('%B %Y')
-        headers = [prefix, f"{type_calcul} Écart matin", f"{type_calcul} Écart soir"]
-        if df_total is not None:
-            headers.extend(["Total écart matin", "Total écart soir"])
-        table.clearContents()
-        table.setRowCount(len(df_moyenne))
-        table.setColumnCount(len(headers))
-        table.setHorizontalHeaderLabels(headers)
-        for row, (index, data) in enumerate(df_moyenne.iterrows()):
-            table.setItem(row, 0, QTableWidgetItem(str(index)))
-            moy_matin = pd.to_timedelta(data.get('ecart_matin_min', 0), unit='m')
-            moy_soir = pd.to_timedelta(data.get('ecart_soir_min', 0), unit='m')
-            table.setItem(row, 1, QTableWidgetItem(format_timedelta_display(moy_matin)))
-            table.setItem(row, 2, QTableWidgetItem(format_timedelta_display(moy_soir)))
-            if df_total is not None:
-                total_data = df_total.loc[df_total.index.strftime('%B %Y') == index]
-                if not total_data.empty:
-                    tot_matin = pd.to_timedelta(total_data['ecart_matin_min'].iloc[0], unit='m')
-                    tot_soir = pd.to_timedelta(total_data['ecart_soir_min'].iloc[0], unit='m')
-                    table.setItem(row, 3, QTableWidgetItem(format_timedelta_display(tot_matin)))
-                    table.setItem(row, 4, QTableWidgetItem(format_timedelta_display(tot_soir)))
-        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    def _maj_statistiques(self):
+        selected_employee = self.employee_selector.currentText()
+        filtre = None if selected_employee == self.TOUS_LES_EMPLOYES else selected_employee
+        if filtre is None:
+            jours = sum(j for _, j in self.employee_stats.values())
+            self.stats_label.setText(f"👥 <b>{len(self.employee_stats)} employé(s)</b><br>"
+                                     f"Nombre de jours analysés (avec écarts) : {jours}")
+        else:
+            plaque_camion, jours = self.employee_stats.get(filtre, ("", 0))
+            self.stats_label.setText(f"👤 <b>{filtre}</b> | 🚚 <b>{plaque_camion}</b><br>"
+                                     f"Nombre de jours analysés (avec écarts) : {jours}")
 
 
 class AnalyseurMainWindow(QMainWindow):
@@ -250,15 +586,42 @@ class AnalyseurMainWindow(QMainWindow):
         self.resize(800, 600)
         self.paths_pointage = []
         self.paths_gps = []
+        # Fichiers GPS chargés : {chemin absolu: (taille, date de modification en ns)}
+        self.fichiers_gps = {}
         self.donnees_employes = {}
         self.donnees_gps_par_camion = {}
+        self.empreintes_employes = {}
+        self.empreintes_gps = {}
+        # Trajets de donnees_gps_par_camion indexés par (plaque, date), analyse_core.TrajetsGPS
+        self.trajets_gps = None
+        # Résultats déjà calculés : {nom_employe: (cle, resultats, resume)},
+        # cle = (empreinte pointage, plaque, empreinte GPS, journées sur un autre camion)
+        self.resultats_memorises = {}
+        # Dernière proposition de l'association automatique (affectation_camions) :
+        # camions principaux et planning journalier ; oubliée à chaque chargement de fichiers
+        self.affectations_proposees = {}
+        self.planning_camions = None
+        # Règles de dépôt chargées (regles_depot.ReglesDepot), None : règles par défaut
+        self.regles_depot = None
+        self.cache_lecture = CacheLecture()
+        # Préférences conservées d'une session à l'autre
+        self.parametres = QSettings("Pointage_HCP", "Analyseur")
+        # Employé-jours de chaque analyse, conservés d'une session à l'autre pour les résumés sur plusieurs mois.
+        # Noms et horaires des employés : enregistrés seulement si l'utilisateur l'a accepté
+        self.historique = HistoriqueAnalyses(actif=self.parametres.value("historique/actif", False, type=bool))
+        self._thread = None
+        self._travail = None
+        self._message_erreur = ""
         self._setup_ui()
         self._setup_menu()
+        self._setup_status_bar()
         self.tab_button_group.buttonClicked.connect(self.switch_tab)
         QTimer.singleShot(0, lambda: self.tab_buttons["Détail par jour"].click())
         
         # --- AJOUT: On connecte le signal du widget de détail à la fonction d'analyse ---
         self.page_details.analyse_requested.connect(self.lancer_analyse_globale)
+        self.page_details.association_auto_requested.connect(self.lancer_association_auto)
+        self.page_resume.historique_requested.connect(self.afficher_historique)
 
     def _setup_ui(self):
         main_widget = QWidget()
@@ -309,12 +672,204 @@ class AnalyseurMainWindow(QMainWindow):
     def _setup_menu(self):
         menubar = self.menuBar()
         file_menu = menubar.addMenu("Fichier")
-        action_pointage = QAction("Charger fichiers pointage", self)
-        action_pointage.triggered.connect(self.select_fichier_pointage)
-        file_menu.addAction(action_pointage)
-        action_gps = QAction("Charger fichiers GPS", self)
-        action_gps.triggered.connect(self.select_fichiers_gps)
-        file_menu.addAction(action_gps)
+        self.action_pointage = QAction("Charger fichiers pointage", self)
+        self.action_pointage.triggered.connect(self.select_fichier_pointage)
+        file_menu.addAction(self.action_pointage)
+        self.action_gps = QAction("Charger fichiers GPS", self)
+        self.action_gps.triggered.connect(self.select_fichiers_gps)
+        file_menu.addAction(self.action_gps)
+        self.action_ajout_gps = QAction("Ajouter des fichiers GPS", self)
+        self.action_ajout_gps.triggered.connect(self.ajouter_fichiers_gps)
+        file_menu.addAction(self.action_ajout_gps)
+        self.action_regles = QAction("Charger les règles de dépôt...", self)
+        self.action_regles.triggered.connect(self.charger_regles_depot)
+        file_menu.addAction(self.action_regles)
+        self.action_regles_defaut = QAction("Règles de dépôt par défaut", self)
+        self.action_regles_defaut.triggered.connect(self.regles_depot_par_defaut)
+        file_menu.addAction(self.action_regles_defaut)
+        self.action_export = QAction("Exporter les résultats...", self)
+        self.action_export.triggered.connect(self.exporter_resultats)
+        file_menu.addAction(self.action_export)
+        file_menu.addSeparator()
+        action_cache = QAction("Utiliser le cache de lecture", self)
+        action_cache.setCheckable(True)
+        action_cache.setChecked(self.cache_lecture.actif)
+        action_cache.toggled.connect(self.set_cache_actif)
+        file_menu.addAction(action_cache)
+        action_vider_cache = QAction("Vider le cache de lecture", self)
+        action_vider_cache.triggered.connect(self.vider_cache)
+        file_menu.addAction(action_vider_cache)
+        self.action_historique = QAction("Enregistrer les analyses dans l'historique", self)
+        self.action_historique.setCheckable(True)
+        self.action_historique.setChecked(self.historique.actif)
+        self.action_historique.setToolTip(self.historique.chemin)
+        self.action_historique.toggled.connect(self.set_historique_actif)
+        file_menu.addAction(self.action_historique)
+
+        diagnostic_menu = menubar.addMenu("Diagnostic")
+        action_profilage = QAction("Profilage détaillé (cProfile)", self)
+        action_profilage.setCheckable(True)
+        action_profilage.setChecked(mesures.profilage)
+        action_profilage.toggled.connect(self.set_profilage)
+        diagnostic_menu.addAction(action_profilage)
+        action_mesures = QAction("Enregistrer les mesures du dernier traitement...", self)
+        action_mesures.triggered.connect(self.enregistrer_mesures)
+        diagnostic_menu.addAction(action_mesures)
+
+    def _setup_status_bar(self):
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedWidth(200)
+        self.progress_bar.hide()
+        self.cancel_button = QPushButton("Annuler")
+        self.cancel_button.hide()
+        self.cancel_button.clicked.connect(self.annuler_traitement)
+        # Répartition du temps du dernier traitement ; le détail de toutes les étapes en infobulle
+        self.mesures_label = QLabel()
+        self.mesures_label.hide()
+        self.statusBar().addPermanentWidget(self.mesures_label)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().addPermanentWidget(self.cancel_button)
+
+    def _lancer_en_arriere_plan(self, fonction, on_termine, message_erreur, on_partiel=None, on_erreur=None,
+                                libelle=""):
+        """
+        Exécute fonction(travail) dans un QThread ; un seul traitement à la fois.
+        Tous les signaux sont reliés à des méthodes de la fenêtre pour être traités dans le thread de l'interface.
+        Par défaut, une erreur est affichée dans la page Détails ; on_erreur permet de la signaler autrement.
+        Les mesures d'instrumentation (temps par étape) repartent de zéro pour chaque traitement.
+        """
+        if self._thread is not None:
+            return
+        mesures.vider(libelle)
+        self._message_erreur = message_erreur
+        self._thread = QThread(self)
+        self._travail = TravailArrierePlan(fonction)
+        self._travail.moveToThread(self._thread)
+        self._thread.started.connect(self._travail.run)
+        self._travail.progression.connect(self._afficher_progression)
+        for signal in (self._travail.termine, self._travail.erreur, self._travail.annule):
+            signal.connect(self._fin_traitement)
+        if on_partiel is not None:
+            self._travail.resultat_partiel.connect(on_partiel)
+        self._travail.termine.connect(on_termine)
+        self._travail.erreur.connect(on_erreur or self._afficher_erreur)
+        self._travail.annule.connect(self._traitement_annule)
+        # Reliées en dernier : la durée totale inclut l'affichage fait par on_termine
+        for signal in (self._travail.termine, self._travail.erreur, self._travail.annule):
+            signal.connect(self._terminer_mesures)
+        self._set_occupe(True)
+        self._thread.start()
+
+    def _fin_traitement(self, *_):
+        self._thread.quit()
+        self._thread.wait()
+        self._travail.deleteLater()
+        self._thread.deleteLater()
+        self._thread = None
+        self._travail = None
+        self._set_occupe(False)
+
+    def _terminer_mesures(self, *_):
+        # Après les résultats partiels et le gestionnaire de fin : la durée inclut tout l'affichage
+        mesures.terminer()
+        self._afficher_mesures()
+
+    def _afficher_mesures(self):
+        texte = mesures.texte(nb_etapes=3)
+        self.mesures_label.setText(f"⏱ {texte}")
+        self.mesures_label.setToolTip(f"{mesures.libelle}\n{mesures.detail()}" if mesures.libelle else mesures.detail())
+        self.mesures_label.setVisible(bool(texte))
+
+    def _afficher_erreur(self, erreur):
+        self.page_details.display_message(f"❌ {self._message_erreur}:\n{erreur}")
+
+    def _traitement_annule(self):
+        self.page_details.display_message("Traitement annulé.")
+        self.statusBar().showMessage("Traitement annulé.", 5000)
+
+    def _set_occupe(self, occupe):
+        self.action_pointage.setEnabled(not occupe)
+        self.action_gps.setEnabled(not occupe)
+        self.action_ajout_gps.setEnabled(not occupe)
+        self.action_export.setEnabled(not occupe)
+        self.action_regles.setEnabled(not occupe)
+        self.action_regles_defaut.setEnabled(not occupe)
+        self.page_resume.historique_button.setEnabled(not occupe)
+        if hasattr(self.page_details, 'lancer_analyse_button'):
+            self.page_details.lancer_analyse_button.setEnabled(not occupe)
+            self.page_details.association_auto_button.setEnabled(not occupe)
+        self.progress_bar.setVisible(occupe)
+        self.cancel_button.setVisible(occupe)
+        self.cancel_button.setEnabled(True)
+        if occupe:
+            self.progress_bar.setRange(0, 0)
+        else:
+            self.statusBar().clearMessage()
+
+    def _afficher_progression(self, fait, total, libelle):
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(fait)
+        if libelle:
+            self.statusBar().showMessage(f"{fait}/{total} - {libelle}")
+
+    def annuler_traitement(self):
+        if self._travail is not None:
+            self._travail.demander_annulation()
+            self.cancel_button.setEnabled(False)
+            self.statusBar().showMessage("Annulation en cours...")
+
+    def set_cache_actif(self, actif):
+        self.cache_lecture.actif = actif
+
+    def set_historique_actif(self, actif):
+        """Active ou non l'historique après confirmation ; le choix est conservé pour les sessions suivantes."""
+        if actif and not self.historique.actif:
+            reponse = QMessageBox.question(
+                self, "Historique des analyses",
+                "Les noms des employés, leurs horaires de pointage et les horaires GPS de chaque jour analysé "
+                f"seront enregistrés sur cet ordinateur, dans :\n{self.historique.chemin}\n\n"
+                "Ils y restent d'une session à l'autre pour les résumés sur plusieurs mois. Continuer ?")
+            if reponse != QMessageBox.StandardButton.Yes:
+                self.action_historique.setChecked(False)
+                return
+        self.historique.actif = actif
+        self.parametres.setValue("historique/actif", actif)
+
+    def set_profilage(self, actif):
+        mesures.profilage = actif
+
+    def enregistrer_mesures(self):
+        chemin, _ = QFileDialog.getSaveFileName(self, "Enregistrer les mesures", "mesures.json", "JSON (*.json)")
+        if chemin:
+            mesures.ecrire_json(chemin)
+            self.statusBar().showMessage(f"Mesures enregistrées dans {os.path.basename(chemin)}.", 5000)
+
+    def charger_regles_depot(self):
+        """Règles de dépôt lues dans un fichier JSON (voir regles_depot) ; appliquées à la prochaine analyse."""
+        chemin, _ = QFileDialog.getOpenFileName(self, "Charger les règles de dépôt", "", "JSON (*.json)")
+        if not chemin:
+            return
+        from regles_depot import ReglesDepot
+        try:
+            self.regles_depot = ReglesDepot.depuis_json(chemin)
+        except (OSError, ValueError) as e:
+            self.statusBar().showMessage(f"❌ Règles de dépôt non chargées : {e}", 15000)
+            return
+        depots = ", ".join(depot['nom'] for depot in self.regles_depot.depots) or "aucun dépôt"
+        avertissement = self._avertissement_regles_depot()
+        if avertissement:
+            self.statusBar().showMessage(f"Règles de dépôt chargées ({depots}). {avertissement}", 15000)
+            return
+        self.statusBar().showMessage(f"✅ Règles de dépôt chargées ({depots}) : relancez l'analyse pour les appliquer.",
+                                     10000)
+
+    def regles_depot_par_defaut(self):
+        self.regles_depot = None
+        self.statusBar().showMessage("Règles de dépôt par défaut : relancez l'analyse pour les appliquer.", 10000)
+
+    def vider_cache(self):
+        self.cache_lecture.vider()
+        self.statusBar().showMessage("Cache de lecture vidé.", 5000)
     
     def _update_file_load_status(self):
         pointage_ok = bool(self.donnees_employes)
@@ -341,21 +896,155 @@ class AnalyseurMainWindow(QMainWindow):
         file_paths, _ = QFileDialog.getOpenFileNames(self, "Sélectionner le(s) fichier(s) de pointage", "", "Fichiers Excel (*.xlsx *.xls)")
         if file_paths:
             self.paths_pointage = file_paths
-            try:
-                self.donnees_employes = analyse_core.charger_fichier_pointage(self.paths_pointage)
-                self._update_file_load_status()
-            except Exception as e:
-                self.page_details.display_message(f"❌ Erreur lors du chargement du fichier pointage:\n{e}")
+            cache = self.cache_lecture
+
+            def charger(travail):
+                import analyse_core
+                donnees = analyse_core.charger_fichier_pointage(
+                    file_paths, nb_processus=NB_PROCESSUS_CHARGEMENT, cache=cache,
+                    progression=travail.signaler_progression)
+                return donnees, analyse_core.empreintes_pointage(donnees)
+
+            self.page_details.display_message("Chargement des fichiers de pointage...")
+            self._lancer_en_arriere_plan(charger, self._pointage_charge, "Erreur lors du chargement du fichier pointage",
+                                         libelle="Chargement des pointages")
+
+    def _pointage_charge(self, resultat):
+        self.donnees_employes, self.empreintes_employes = resultat
+        self.affectations_proposees, self.planning_camions = {}, None
+        self._update_file_load_status()
 
     def select_fichiers_gps(self):
         file_paths, _ = QFileDialog.getOpenFileNames(self, "Sélectionner le(s) fichier(s) GPS", "", "Fichiers Excel (*.xlsx *.xls)")
         if file_paths:
-            self.paths_gps = file_paths
-            try:
-                self.donnees_gps_par_camion = analyse_core.charger_fichiers_gps(self.paths_gps)
-                self._update_file_load_status()
-            except Exception as e:
-                self.page_details.display_message(f"❌ Erreur lors du chargement des fichiers GPS:\n{e}")
+            self._charger_gps(file_paths, ajout=False)
+
+    def ajouter_fichiers_gps(self):
+        """Lit seulement les fichiers ajoutés et fusionne leurs trajets avec ceux déjà chargés."""
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Ajouter des fichiers GPS", "", "Fichiers Excel (*.xlsx *.xls)")
+        if file_paths:
+            self._charger_gps(file_paths, ajout=bool(self.donnees_gps_par_camion))
+
+    def _charger_gps(self, file_paths, ajout):
+        cache = self.cache_lecture
+        deja_charges = dict(self.fichiers_gps) if ajout else {}
+        donnees_existantes = self.donnees_gps_par_camion if ajout else {}
+        empreintes_existantes = self.empreintes_gps if ajout else {}
+
+        def charger(travail):
+            import analyse_core
+            nouveaux = {}
+            if not deja_charges:
+                nouveaux = {os.path.abspath(file_path): _signature_fichier(file_path) for file_path in file_paths}
+            else:
+                # Un fichier déjà chargé (même chemin ou même contenu) et inchangé n'est pas relu.
+                # Comparaison par taille et date de modification ; le contenu n'est hashé que pour
+                # un fichier de même taille qu'un fichier chargé sous un autre chemin
+                chemins_par_taille = {}
+                for chemin, (taille, _) in deja_charges.items():
+                    chemins_par_taille.setdefault(taille, []).append(chemin)
+                hashes_charges = {}
+
+                def hash_charge(chemin):
+                    if chemin not in hashes_charges:
+                        try:
+                            inchange = _signature_fichier(chemin) == deja_charges[chemin]
+                            hashes_charges[chemin] = hash_contenu(chemin) if inchange else None
+                        except OSError:
+                            hashes_charges[chemin] = None
+                    return hashes_charges[chemin]
+
+                for i, file_path in enumerate(file_paths):
+                    travail.signaler_progression(i, len(file_paths), f"Vérification de {os.path.basename(file_path)}")
+                    chemin, signature = os.path.abspath(file_path), _signature_fichier(file_path)
+                    if deja_charges.get(chemin) == signature:
+                        continue
+                    autres = [autre for autre in chemins_par_taille.get(signature[0], []) if autre != chemin]
+                    if autres:
+                        empreinte = hash_contenu(file_path)
+                        if any(hash_charge(autre) == empreinte for autre in autres):
+                            continue
+                    nouveaux[chemin] = signature
+            donnees = analyse_core.charger_fichiers_gps(
+                list(nouveaux), nb_processus=NB_PROCESSUS_CHARGEMENT, cache=cache,
+                progression=travail.signaler_progression)
+            # Seuls les camions touchés par les nouveaux fichiers changent d'empreinte
+            fusion = analyse_core.fusionner_donnees_gps(donnees_existantes, donnees)
+            empreintes = {plaque: e for plaque, e in empreintes_existantes.items() if plaque not in donnees}
+            empreintes.update(analyse_core.empreintes_gps({plaque: fusion[plaque] for plaque in donnees}))
+            return (fusion, empreintes, {**deja_charges, **nouveaux}, len(file_paths) - len(nouveaux),
+                    analyse_core.TrajetsGPS(fusion))
+
+        self.page_details.display_message("Ajout des fichiers GPS..." if ajout else "Chargement des fichiers GPS...")
+        self._lancer_en_arriere_plan(charger, self._gps_charge, "Erreur lors du chargement des fichiers GPS",
+                                     libelle="Ajout de fichiers GPS" if ajout else "Chargement des fichiers GPS")
+
+    def _gps_charge(self, resultat):
+        self.donnees_gps_par_camion, self.empreintes_gps, self.fichiers_gps, nb_ignores, self.trajets_gps = resultat
+        self.affectations_proposees, self.planning_camions = {}, None
+        self.paths_gps = list(self.fichiers_gps)
+        self._update_file_load_status()
+        if nb_ignores:
+            self.statusBar().showMessage(f"{nb_ignores} fichier(s) GPS déjà chargé(s) ignoré(s).", 5000)
+        avertissement = self._avertissement_regles_depot()
+        if avertissement:
+            self.statusBar().showMessage(avertissement, 15000)
+
+    def _avertissement_regles_depot(self):
+        """Message si des camions listés dans les règles de dépôt ne sont pas parmi les camions chargés."""
+        if self.regles_depot is None or not self.donnees_gps_par_camion:
+            return ""
+        inconnues = self.regles_depot.plaques_inconnues(self.donnees_gps_par_camion)
+        if not inconnues:
+            return ""
+        return (f"⚠ Camion(s) des règles de dépôt sans données GPS : "
+                f"{', '.join(f'{plaque} ({depot})' for depot, plaque in inconnues)}")
+
+    def lancer_association_auto(self):
+        if not self.donnees_employes or not self.donnees_gps_par_camion:
+            return
+        donnees_employes = self.donnees_employes
+        donnees_gps = self._donnees_gps()
+        regles = self.regles_depot
+
+        def associer(travail):
+            import pandas as pd
+            import affectation_camions
+
+            df_pointage = pd.concat(list(donnees_employes.values()), ignore_index=True)
+            return affectation_camions.proposer_affectations(df_pointage, donnees_gps, regles)
+
+        self.statusBar().showMessage("Recherche des associations employé-camion...")
+        self._lancer_en_arriere_plan(associer, self._associations_proposees, "Erreur pendant l'association automatique",
+                                     libelle="Association automatique")
+
+    def _associations_proposees(self, resultat):
+        affectations, planning = resultat
+        self.affectations_proposees, self.planning_camions = affectations, planning
+        self.page_details.appliquer_associations(affectations)
+        nb_changements = int(planning['changement'].sum())
+        message = f"✅ {len(affectations)}/{len(self.donnees_employes)} employé(s) associé(s) automatiquement."
+        if nb_changements:
+            message += f" {nb_changements} jour(s) sur un autre camion que le camion principal."
+        self.statusBar().showMessage(message, 10000)
+
+    def _donnees_gps(self):
+        return self.trajets_gps if self.trajets_gps is not None else self.donnees_gps_par_camion
+
+    def _changements_camion(self, assignments):
+        """
+        Journées où, d'après le planning proposé, un employé a conduit un autre camion que
+        son camion principal : {nom_employe: DataFrame (nom_employe, date, plaque_camion)}.
+        Ignorées pour un employé dont le camion a été modifié à la main depuis la proposition.
+        """
+        if self.planning_camions is None:
+            return {}
+        changements = self.planning_camions[self.planning_camions['changement']]
+        return {
+            nom: lignes[['nom_employe', 'date', 'plaque_camion']]
+            for nom, lignes in changements.groupby('nom_employe', sort=False)
+            if assignments.get(nom) == self.affectations_proposees.get(nom)
+        }
 
     def lancer_analyse_globale(self):
         if not self.donnees_employes or not self.donnees_gps_par_camion:
@@ -363,29 +1052,190 @@ class AnalyseurMainWindow(QMainWindow):
             return
 
         assignments = self.page_details.get_truck_assignments()
-        
-        self.page_details.display_message("Analyse en cours...")
-        self.page_resume.clear_display()
-        QApplication.processEvents()
-
-        has_results = False
-        for nom_employe, df_employe in sorted(self.donnees_employes.items()):
-            assigned_truck = assignments.get(nom_employe)
-            if assigned_truck and assigned_truck != "Aucun":
-                has_results = True
-                gps_data_for_truck = self.donnees_gps_par_camion.get(assigned_truck, {})
-                resultats = analyse_core.analyser_donnees(df_employe, gps_data_for_truck, nom_employe, assigned_truck)
-                resumes = resume_ecart.generer_resume(resultats)
-                self.page_details.afficher_rapport(resultats, nom_employe, assigned_truck, append=True)
-                self.page_resume.afficher_resume(resumes, nom_employe, assigned_truck)
-        
+
+        has_results = any(plaque and plaque != "Aucun" for plaque in assignments.values())
         if not has_results:
             self.page_details.display_message("Aucune association employé-camion n'a été faite ou aucun employé n'a de données valides. L'analyse n'a pas pu être complétée.")
             return
 
-        self.statusBar().showMessage("✅ Analyse terminée.", 5000)
+        # Clé de chaque employé affecté : ses résultats ne sont recalculés que si elle a changé
+        changements = self._changements_camion(assignments)
+        regles = self.regles_depot
+        empreinte_regles = regles.empreinte if regles is not None else None
+        cles = {
+            nom: (self.empreintes_employes.get(nom), plaque, self.empreintes_gps.get(plaque),
+                  tuple((f"{ligne.date:%Y-%m-%d}", ligne.plaque_camion, self.empreintes_gps.get(ligne.plaque_camion))
+                        for ligne in changements[nom].itertuples()) if nom in changements else (),
+                  empreinte_regles)
+            for nom, plaque in assignments.items()
+            if plaque and plaque != "Aucun" and nom in self.donnees_employes
+        }
+        for nom in set(self.page_details.rapports_affiches()) - set(cles):
+            self.page_details.retirer_rapport(nom)
+        for nom in set(self.page_resume.resumes_affiches()) - set(cles):
+            self.page_resume.retirer_resume(nom)
+        if not self.page_details.rapports_affiches():
+            self.page_details.display_message("Analyse en cours...")
+
+        memorises = {nom: memo for nom, memo in self.resultats_memorises.items() if cles.get(nom) == memo[0]}
+        a_calculer = {nom: cles[nom][1] for nom in cles if nom not in memorises}
+        plannings = {nom: changements[nom] for nom in a_calculer if nom in changements}
+        donnees_employes = self.donnees_employes
+        donnees_gps = self._donnees_gps()
+        historique = self.historique
+        self.page_resume.set_source("Dernière analyse")
+
+        def analyser(travail):
+            import sqlite3
+            import pandas as pd
+            import analyse_core
+            import resume_ecart
+
+            erreur_historique = None
+            publies = []
+
+            def publier(nom_employe, cle, resultats, resume):
+                travail.signaler_progression(len(publies), len(cles), nom_employe)
+                travail.resultat_partiel.emit((nom_employe, cle, resultats, resume))
+                publies.append(not resultats.empty)
+
+            # Les employés inchangés sont republiés d'abord : les pages ignorent une clé déjà affichée
+            for nom_employe in sorted(memorises):
+                publier(nom_employe, *memorises[nom_employe])
+
+            # Les autres sont analysés par groupes de taille croissante, publiés dès que leur groupe
+            # est calculé : le premier rapport s'affiche vite, et les groupes suivants gardent
+            # l'essentiel du gain du calcul groupé (un appel d'analyser_lot coûte cher même pour un employé)
+            noms = sorted(a_calculer)
+            debut, taille = 0, 1
+            while debut < len(noms):
+                groupe = noms[debut:debut + taille]
+                debut, taille = debut + len(groupe), min(4 * taille, TAILLE_MAX_GROUPE_ANALYSE)
+                # Annulation vérifiée avant chaque groupe, pas seulement à la publication des résultats
+                travail.signaler_progression(len(publies), len(cles), f"Analyse de {len(groupe)} employé(s)")
+                planning = [plannings[nom] for nom in groupe if nom in plannings]
+                df_pointage = pd.concat([donnees_employes[nom] for nom in groupe], ignore_index=True)
+                df_resultats = analyse_core.analyser_lot(
+                    df_pointage, donnees_gps, {nom: a_calculer[nom] for nom in groupe},
+                    pd.concat(planning) if planning else None, regles)
+                # Un groupe annulé n'est ni enregistré dans l'historique ni affiché
+                travail.verifier_annulation()
+                # Les employés mémorisés ont été enregistrés quand ils ont été calculés
+                try:
+                    historique.enregistrer(df_resultats)
+                except (sqlite3.Error, OSError) as e:
+                    # L'analyse reste affichée même si l'historique n'a pas pu être écrit
+                    erreur_historique = str(e)
+                resumes = resume_ecart.generer_resumes(df_resultats)
+                groupes_resultats = dict(list(df_resultats.groupby('nom_employe', sort=True, observed=True)))
+                groupes_resumes = dict(list(resumes.groupby('nom_employe', sort=True)))
+                for nom_employe in groupe:
+                    publier(nom_employe, cles[nom_employe], groupes_resultats.get(nom_employe, df_resultats.iloc[:0]),
+                            groupes_resumes.get(nom_employe, resumes.iloc[:0]))
+
+            travail.signaler_progression(len(cles), len(cles))
+            return sum(publies), erreur_historique
+
+        self._lancer_en_arriere_plan(analyser, self._analyse_terminee, "Erreur pendant l'analyse",
+                                     on_partiel=self._afficher_resultat_employe, libelle="Analyse")
+
+    def _afficher_resultat_employe(self, resultat):
+        nom_employe, cle, resultats, resume = resultat
+        self.resultats_memorises[nom_employe] = (cle, resultats, resume)
+        assigned_truck = cle[1]
+        with mesures.etape("Affichage détails") as occurrence:
+            occurrence.lignes = len(resultats)
+            self.page_details.afficher_rapport(resultats, nom_employe, assigned_truck, cle)
+        with mesures.etape("Affichage résumé") as occurrence:
+            occurrence.lignes = len(resume)
+            self.page_resume.afficher_resume(resume, nom_employe, assigned_truck, cle)
+
+    def _analyse_terminee(self, resultat):
+        nb_employes, erreur_historique = resultat
+        if nb_employes == 0:
+            self.page_details.display_message("Aucun employé n'a de données valides pour les camions associés.")
+            return
+        if erreur_historique:
+            self.statusBar().showMessage(f"✅ Analyse terminée, mais pas enregistrée dans l'historique : {erreur_historique}",
+                                         15000)
+        else:
+            self.statusBar().showMessage("✅ Analyse terminée.", 5000)
         self.tab_buttons["Résumé"].click()
 
+    def afficher_historique(self, debut, fin):
+        """Remplace les résumés affichés par ceux de l'historique entre debut et fin, sans relire de classeur."""
+        historique = self.historique
+        periode = f"du {debut:%d/%m/%Y} au {fin:%d/%m/%Y}"
+
+        def lire(travail):
+            import resume_ecart
+
+            resumes = resume_ecart.resumes_historique(historique, debut, fin)
+            plaques = historique.plaques_par_employe(debut, fin)
+            return periode, [(nom, ", ".join(plaques.get(nom, [])), resume)
+                             for nom, resume in resumes.groupby('nom_employe', sort=True)]
+
+        self.statusBar().showMessage(f"Lecture de l'historique {periode}...")
+        self._lancer_en_arriere_plan(lire, self._historique_lu, "Erreur de lecture de l'historique",
+                                     on_erreur=self._erreur_historique, libelle=f"Historique {periode}")
+
+    def _historique_lu(self, resultat):
+        periode, resumes = resultat
+        noms = {nom for nom, _, _ in resumes}
+        for nom in set(self.page_resume.resumes_affiches()) - noms:
+            self.page_resume.retirer_resume(nom)
+        with mesures.etape("Affichage résumé") as occurrence:
+            for nom, plaques, resume in resumes:
+                occurrence.lignes += len(resume)
+                # Sans clé : toujours remplacé, et remplacé à la prochaine analyse
+                self.page_resume.afficher_resume(resume, nom, plaques)
+        if not self.page_resume.resumes_affiches():
+            self.page_resume.set_source("")
+            self.statusBar().showMessage(f"Aucun jour analysé dans l'historique {periode}.", 10000)
+            return
+        self.page_resume.set_source(f"Historique {periode}")
+        self.statusBar().showMessage(f"✅ Historique {periode} : {len(self.page_resume.resumes_affiches())} employé(s).",
+                                     5000)
+
+    def _erreur_historique(self, erreur):
+        self.statusBar().showMessage(f"❌ {self._message_erreur} : {erreur}", 15000)
+
+    def exporter_resultats(self):
+        """Exporte les résultats affichés, tels que mémorisés : l'analyse n'est pas relancée."""
+        noms = [nom for nom in self.page_details.rapports_affiches() if nom in self.resultats_memorises]
+        if not noms:
+            self.statusBar().showMessage("Aucun résultat à exporter : lancez d'abord l'analyse.", 5000)
+            return
+        chemin, filtre = QFileDialog.getSaveFileName(
+            self, "Exporter les résultats", "resultats.xlsx",
+            "Classeur Excel (*.xlsx);;CSV (*.csv);;Parquet (*.parquet)")
+        if not chemin:
+            return
+        if not os.path.splitext(chemin)[1]:
+            chemin += filtre[filtre.index('(*') + 2:-1]
+        resultats = [self.resultats_memorises[nom][1] for nom in noms]
+        resumes = [self.resultats_memorises[nom][2] for nom in noms]
+
+        def exporter(travail):
+            import pandas as pd
+            import export_resultats
+
+            return export_resultats.exporter_resultats(
+                chemin, pd.concat(resultats, ignore_index=True), pd.concat(resumes, ignore_index=True),
+                progression=travail.signaler_progression)
+
+        self.statusBar().showMessage("Export des résultats...")
+        self._lancer_en_arriere_plan(exporter, self._export_termine, "Erreur pendant l'export",
+                                     on_erreur=self._erreur_export, libelle="Export")
+
+    def _export_termine(self, fichiers):
+        noms = ", ".join(os.path.basename(fichier) for fichier in fichiers)
+        self.statusBar().showMessage(f"✅ Résultats exportés : {noms}", 10000)
+
+    def _erreur_export(self, erreur):
+        # Les rapports affichés restent en place : l'erreur est signalée dans la barre d'état
+        self.statusBar().showMessage(f"❌ {self._message_erreur} : {erreur}", 15000)
+
     def switch_tab(self, button):
         self.pages.setCurrentIndex(self.tab_button_group.id(button))
         self._update_underline_position(animate=True)
@@ -405,6 +1255,8 @@ class AnalyseurMainWindow(QMainWindow):
 
 
 if __name__ == '__main__':
+    # Nécessaire pour le ProcessPoolExecutor dans l'exécutable PyInstaller
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = AnalyseurMainWindow()
     window.show()
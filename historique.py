@@ -0,0 +1,224 @@
+# historique.py
+
+"""
+Historique local des analyses, dans une base SQLite : chaque employé-jour analysé
+(une ligne de analyse_core.analyser_lot) y est enregistré, ou remplacé s'il l'avait
+déjà été. Les résumés sur plusieurs mois (resume_ecart.resumes_historique) sont
+ensuite calculés à partir de la base, sans relire les classeurs Excel.
+
+La table est indexée par employé et date (clé primaire), par camion et date, et
+par date : une lecture filtrée sur une période ne parcourt que les lignes demandées.
+Seul l'enregistrement crée la base ; les lectures l'ouvrent en lecture seule et
+voient un historique vide tant qu'elle n'existe pas. Une base d'une autre version
+(PRAGMA user_version) est refusée plutôt que réinitialisée.
+Les dates et heures sont stockées en texte ISO (AAAA-MM-JJ HH:MM:SS), qui se trie
+et se compare comme les dates ; les durées en secondes.
+"""
+
+import os
+import pathlib
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+from instrumentation import mesure
+
+# À incrémenter quand la structure de la table change (PRAGMA user_version)
+VERSION_SCHEMA = 1
+# Attente maximale (s) quand un autre processus écrit dans la base
+DELAI_VERROU = 30
+
+COLONNES_DATES = ['pointage_debut', 'pointage_fin', 'gps_arrivee', 'gps_depart']
+COLONNES_DUREES = ['temps_travail', 'temps_pause', 'ecart_matin', 'ecart_soir']
+COLONNES_HISTORIQUE = ['nom_employe', 'date', 'plaque_camion'] + COLONNES_DATES + COLONNES_DUREES
+
+_CREATION = f"""
+CREATE TABLE IF NOT EXISTS jours (
+    nom_employe TEXT NOT NULL,
+    date TEXT NOT NULL,
+    plaque_camion TEXT,
+    {', '.join(f'{colonne} TEXT' for colonne in COLONNES_DATES)},
+    {', '.join(f'{colonne} REAL' for colonne in COLONNES_DUREES)},
+    enregistre_le TEXT NOT NULL,
+    PRIMARY KEY (nom_employe, date)
+);
+CREATE INDEX IF NOT EXISTS jours_plaque_date ON jours (plaque_camion, date);
+CREATE INDEX IF NOT EXISTS jours_date ON jours (date);
+PRAGMA user_version = {VERSION_SCHEMA};
+"""
+
+_UPSERT = (
+    f"INSERT INTO jours ({', '.join(COLONNES_HISTORIQUE)}, enregistre_le) "
+    f"VALUES ({', '.join('?' * (len(COLONNES_HISTORIQUE) + 1))}) "
+    f"ON CONFLICT (nom_employe, date) DO UPDATE SET "
+    + ", ".join(f"{colonne} = excluded.{colonne}" for colonne in COLONNES_HISTORIQUE[2:] + ['enregistre_le'])
+)
+
+
+def chemin_historique_defaut():
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(base, 'Pointage_HCP', 'historique.sqlite')
+    base = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, 'pointage_hcp', 'historique.sqlite')
+
+
+def _texte_date(valeur):
+    """Date (date, datetime, Timestamp ou texte) en texte AAAA-MM-JJ, None si absente."""
+    if valeur is None:
+        return None
+    import pandas as pd
+    return pd.Timestamp(valeur).strftime('%Y-%m-%d')
+
+
+def _textes(colonne, format_date):
+    valeurs = colonne.dt.strftime(format_date).astype(object).to_numpy()
+    valeurs[colonne.isna().to_numpy()] = None
+    return valeurs
+
+
+def _secondes(colonne):
+    valeurs = colonne.dt.total_seconds().astype(object).to_numpy()
+    valeurs[colonne.isna().to_numpy()] = None
+    return valeurs
+
+
+class HistoriqueAnalyses:
+    """
+    Base SQLite des employé-jours analysés. actif=False désactive l'enregistrement
+    sans changer l'appelant ; la lecture reste possible.
+    Une connexion est ouverte à chaque opération : l'historique peut être utilisé
+    depuis le thread de travail de l'interface ou depuis plusieurs processus.
+    """
+
+    def __init__(self, chemin=None, actif=True):
+        self.chemin = chemin or chemin_historique_defaut()
+        self.actif = actif
+
+    def _verifier_version(self, connexion, creer):
+        """
+        Vérifie la version de la base ; crée la table dans une base neuve si `creer`.
+        Retourne False si la base est neuve et n'a pas été créée (historique vide).
+        """
+        version = connexion.execute("PRAGMA user_version").fetchone()[0]
+        if version == VERSION_SCHEMA:
+            return True
+        neuve = version == 0 and connexion.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+        if not neuve:
+            raise sqlite3.DatabaseError(
+                f"Historique {self.chemin} : version {version} de la base, version {VERSION_SCHEMA} attendue")
+        if creer:
+            connexion.executescript(_CREATION)
+        return creer
+
+    def _connexion(self):
+        """Connexion en écriture ; crée la base et sa table si besoin."""
+        dossier = os.path.dirname(os.path.abspath(self.chemin))
+        os.makedirs(dossier, exist_ok=True)
+        connexion = sqlite3.connect(self.chemin, timeout=DELAI_VERROU)
+        try:
+            self._verifier_version(connexion, creer=True)
+        except sqlite3.Error:
+            connexion.close()
+            raise
+        return connexion
+
+    def _connexion_lecture(self):
+        """Connexion en lecture seule, None si la base n'existe pas encore : rien n'est écrit sur le disque."""
+        if not os.path.isfile(self.chemin):
+            return None
+        uri = pathlib.Path(os.path.abspath(self.chemin)).as_uri() + "?mode=ro"
+        connexion = sqlite3.connect(uri, uri=True, timeout=DELAI_VERROU)
+        try:
+            if self._verifier_version(connexion, creer=False):
+                return connexion
+        except sqlite3.Error:
+            connexion.close()
+            raise
+        connexion.close()
+        return None
+
+    @mesure("Enregistrement historique", lambda nb_lignes: nb_lignes)
+    def enregistrer(self, resultats):
+        """
+        Ajoute les lignes de `resultats` (DataFrame d'analyser_lot) à l'historique ;
+        un employé-jour déjà présent est remplacé. Retourne le nombre de lignes écrites.
+        """
+        if not self.actif or resultats.empty:
+            return 0
+        colonnes = [
+            resultats['nom_employe'].astype(object).to_numpy(),
+            _textes(resultats['date'], '%Y-%m-%d'),
+            resultats['plaque_camion'].astype(object).to_numpy(),
+            *(_textes(resultats[colonne], '%Y-%m-%d %H:%M:%S') for colonne in COLONNES_DATES),
+            *(_secondes(resultats[colonne]) for colonne in COLONNES_DUREES),
+            [datetime.now().isoformat(sep=' ', timespec='seconds')] * len(resultats),
+        ]
+        with closing(self._connexion()) as connexion, connexion:
+            connexion.executemany(_UPSERT, zip(*colonnes))
+        return len(resultats)
+
+    @staticmethod
+    def _filtres(debut, fin, employes=None, plaques=None):
+        conditions, parametres = [], []
+        if debut is not None:
+            conditions.append("date >= ?")
+            parametres.append(_texte_date(debut))
+        if fin is not None:
+            conditions.append("date <= ?")
+            parametres.append(_texte_date(fin))
+        for colonne, valeurs in (('nom_employe', employes), ('plaque_camion', plaques)):
+            if valeurs is not None:
+                valeurs = list(valeurs)
+                conditions.append(f"{colonne} IN ({', '.join('?' * len(valeurs))})")
+                parametres.extend(valeurs)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), parametres
+
+    @mesure("Lecture historique", len)
+    def lire(self, debut=None, fin=None, employes=None, plaques=None):
+        """
+        Employé-jours enregistrés entre debut et fin inclus (None : sans limite),
+        éventuellement limités à certains employés ou camions. Retourne un DataFrame
+        typé comme celui d'analyse_core.analyser_lot, trié par employé puis par date.
+        """
+        import pandas as pd
+        import analyse_core
+
+        where, parametres = self._filtres(debut, fin, employes, plaques)
+        requete = f"SELECT {', '.join(COLONNES_HISTORIQUE)} FROM jours{where} ORDER BY nom_employe, date"
+        connexion = self._connexion_lecture()
+        if connexion is None:
+            df = pd.DataFrame({colonne: pd.Series(dtype=object) for colonne in COLONNES_HISTORIQUE})
+        else:
+            with closing(connexion):
+                df = pd.read_sql_query(requete, connexion, params=parametres)
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+        for colonne in COLONNES_DATES:
+            df[colonne] = pd.to_datetime(df[colonne], format='%Y-%m-%d %H:%M:%S')
+        for colonne in COLONNES_DUREES:
+            df[colonne] = pd.to_timedelta(df[colonne].astype(float), unit='s')
+        return analyse_core.appliquer_schema(df[analyse_core.COLONNES_RESULTATS], analyse_core.SCHEMA_RESULTATS)
+
+    def plaques_par_employe(self, debut=None, fin=None):
+        """{nom_employe: [plaques]} des camions de chaque employé sur la période, triés."""
+        where, parametres = self._filtres(debut, fin)
+        requete = (f"SELECT DISTINCT nom_employe, plaque_camion FROM jours{where} "
+                   f"ORDER BY nom_employe, plaque_camion")
+        plaques = {}
+        connexion = self._connexion_lecture()
+        if connexion is None:
+            return plaques
+        with closing(connexion):
+            for nom, plaque in connexion.execute(requete, parametres):
+                plaques.setdefault(nom, [])
+                if plaque is not None:
+                    plaques[nom].append(plaque)
+        return plaques
+
+    def bornes(self):
+        """(première date, dernière date) enregistrées, en texte AAAA-MM-JJ ; (None, None) si vide."""
+        connexion = self._connexion_lecture()
+        if connexion is None:
+            return None, None
+        with closing(connexion):
+            return connexion.execute("SELECT MIN(date), MAX(date) FROM jours").fetchone()
@@ -0,0 +1,189 @@
+# instrumentation.py
+
+"""
+Mesure du temps passé par étape (lecture des fichiers, analyse, résumés, affichage),
+pour savoir où part le temps d'un traitement lent.
+
+Les fonctions instrumentées sont décorées par @mesure(nom, lignes) ; chaque appel
+ajoute sa durée et son nombre de lignes traitées à l'étape `nom` du collecteur global
+`mesures`. Avec mesures.profilage = True, chaque étape est aussi profilée par cProfile
+(les fonctions les plus coûteuses figurent dans le rapport JSON).
+
+Le collecteur est partagé entre le thread de l'interface et le thread de travail.
+Une étape appelée à l'intérieur d'une autre (analyser_donnees -> analyser_lot) est
+enregistrée à part, comme imbriquée : elle figure dans le rapport mais n'est pas
+comptée dans le résumé, pour ne pas compter deux fois le même temps.
+"""
+
+import functools
+import json
+import platform
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Nombre de fonctions retenues par étape dans le profil cProfile du rapport
+LIGNES_PROFIL = 25
+
+
+class Mesures:
+    """Collecteur des mesures du traitement en cours, étape par étape."""
+
+    def __init__(self):
+        self.profilage = False
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+        self.vider()
+
+    def vider(self, libelle=""):
+        """Oublie les mesures précédentes ; `libelle` décrit le traitement qui commence."""
+        with self._verrou:
+            self.libelle = libelle
+            self.debut = datetime.now()
+            self.duree = None
+            self._debut_perf = time.perf_counter()
+            self._etapes = {}
+
+    def terminer(self):
+        """Note la durée totale du traitement, depuis vider()."""
+        self.duree = time.perf_counter() - self._debut_perf
+
+    @contextmanager
+    def etape(self, nom):
+        """
+        Mesure le bloc comme une occurrence de l'étape `nom`. L'objet renvoyé a un
+        attribut `lignes` à renseigner avec le nombre de lignes traitées.
+        """
+        profondeur = getattr(self._local, 'profondeur', 0)
+        # Étape inscrite dès son début : le rapport suit l'ordre des appels, englobante d'abord
+        etape = self._entree(nom, profondeur > 0)
+        occurrence = _Occurrence()
+        profil = None
+        # Un seul profileur actif par thread : les étapes imbriquées sont dans le profil de l'englobante
+        if self.profilage and profondeur == 0:
+            import cProfile
+            profil = cProfile.Profile()
+            profil.enable()
+        self._local.profondeur = profondeur + 1
+        debut = time.perf_counter()
+        try:
+            yield occurrence
+        finally:
+            duree = time.perf_counter() - debut
+            self._local.profondeur = profondeur
+            if profil is not None:
+                profil.disable()
+            self._ajouter(etape, duree, occurrence.lignes, profil)
+
+    def _entree(self, nom, imbriquee):
+        with self._verrou:
+            return self._etapes.setdefault((nom, imbriquee), {
+                'appels': 0, 'secondes': 0.0, 'secondes_max': 0.0, 'lignes': 0,
+                'imbriquee': imbriquee, 'profil': None,
+            })
+
+    def _ajouter(self, etape, duree, lignes, profil):
+        with self._verrou:
+            etape['appels'] += 1
+            etape['secondes'] += duree
+            etape['secondes_max'] = max(etape['secondes_max'], duree)
+            etape['lignes'] += lignes or 0
+            if profil is not None:
+                import pstats
+                if etape['profil'] is None:
+                    etape['profil'] = pstats.Stats(profil)
+                else:
+                    etape['profil'].add(profil)
+
+    def etapes(self, imbriquees=False):
+        """Liste de (nom, mesure), dans l'ordre des premiers appels."""
+        with self._verrou:
+            return [(nom, dict(etape)) for (nom, imbriquee), etape in self._etapes.items()
+                    if etape['appels'] and (imbriquees or not imbriquee)]
+
+    def texte(self, nb_etapes=None):
+        """
+        Résumé d'une ligne, étapes les plus longues d'abord :
+        "Total 2,31 s : Lecture GPS 1,92 s · Analyse 112 ms".
+        """
+        etapes = sorted(self.etapes(), key=lambda item: item[1]['secondes'], reverse=True)
+        texte = " · ".join(f"{nom} {_secondes(etape['secondes'])}" for nom, etape in etapes[:nb_etapes])
+        if self.duree is None:
+            return texte
+        return f"Total {_secondes(self.duree)} : {texte}" if texte else f"Total {_secondes(self.duree)}"
+
+    def detail(self):
+        """Tableau texte de toutes les étapes, pour une infobulle ou un journal."""
+        lignes = []
+        for nom, etape in self.etapes(imbriquees=True):
+            retrait = "    " if etape['imbriquee'] else ""
+            lignes.append(f"{retrait}{nom} : {_secondes(etape['secondes'])}, {etape['appels']} appel(s), "
+                          f"{etape['lignes']} ligne(s)")
+        return "\n".join(lignes)
+
+    def rapport(self):
+        """Mesures sous forme de dictionnaire sérialisable en JSON."""
+        etapes = []
+        for nom, etape in self.etapes(imbriquees=True):
+            profil = etape.pop('profil')
+            etape['nom'] = nom
+            if profil is not None:
+                etape['profil'] = _texte_profil(profil)
+            etapes.append(etape)
+        return {
+            'libelle': self.libelle,
+            'debut': self.debut.isoformat(timespec='seconds'),
+            'secondes_total': self.duree,
+            'profilage': self.profilage,
+            'environnement': {'python': platform.python_version(), 'plateforme': platform.platform()},
+            'etapes': etapes,
+        }
+
+    def ecrire_json(self, chemin):
+        with open(chemin, 'w', encoding='utf-8') as f:
+            json.dump(self.rapport(), f, ensure_ascii=False, indent=2)
+
+
+class _Occurrence:
+    __slots__ = ('lignes',)
+
+    def __init__(self):
+        self.lignes = 0
+
+
+def _secondes(secondes):
+    if secondes < 1:
+        return f"{secondes * 1000:.0f} ms"
+    return f"{secondes:.2f} s".replace('.', ',')
+
+
+def _texte_profil(stats):
+    import io
+    import pstats
+
+    sortie = io.StringIO()
+    copie = pstats.Stats(stream=sortie)
+    copie.add(stats)
+    copie.sort_stats('cumulative').print_stats(LIGNES_PROFIL)
+    return sortie.getvalue()
+
+
+mesures = Mesures()
+
+
+def mesure(nom, lignes=None):
+    """
+    Décorateur : chaque appel de la fonction est mesuré comme une occurrence de l'étape
+    `nom` ; `lignes(resultat)` donne le nombre de lignes traitées.
+    """
+    def decorer(fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            with mesures.etape(nom) as occurrence:
+                resultat = fonction(*args, **kwargs)
+                if lignes is not None:
+                    occurrence.lignes = lignes(resultat)
+                return resultat
+        return enveloppe
+    return decorer
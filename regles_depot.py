@@ -0,0 +1,212 @@
+# regles_depot.py
+
+"""
+Règles donnant, pour chaque camion et chaque jour, l'arrivée GPS du matin et le
+départ GPS du soir comparés aux pointages.
+
+Les règles par défaut (REGLES_DEFAUT) sont celles de toujours : arrivée du premier
+trajet de la journée, départ du dernier trajet d'au moins 25 minutes dont le lieu
+d'arrivée contient "Gardanne". Un fichier JSON permet de décrire plusieurs dépôts :
+
+    {
+      "matin": "premier_trajet",
+      "soir": "dernier_retour_depot",
+      "depots": [
+        {"nom": "Gardanne", "lieu": "Gardanne", "duree_min": 25},
+        {"nom": "Fos", "regex": "^Fos[- ]sur[- ]Mer", "duree_min": 15,
+         "plaques": ["AB 123 CD", "EF 456 GH"], "ignorer_casse": true}
+      ]
+    }
+
+- lieu : texte contenu dans le lieu d'arrivée, ou regex : expression régulière
+  cherchée dans le lieu d'arrivée (un dépôt a l'un ou l'autre) ;
+- duree_min : durée minimale en minutes d'un retour au dépôt (0 par défaut) ;
+- plaques : camions rattachés au dépôt (tous les camions si absent), écrits comme
+  dans les noms des fichiers GPS ; tirets et soulignés valent des espaces, comme
+  dans analyse_core._plaque_depuis_nom ("AB-123-CD" devient "AB 123 CD") ;
+- matin : "premier_trajet" (arrivée du premier trajet) ou "premier_hors_depot"
+  (arrivée du premier trajet qui ne va pas à un dépôt du camion) ;
+- soir : "dernier_retour_depot" (départ du dernier retour valide à un dépôt du
+  camion) ou "dernier_trajet" (départ du dernier trajet).
+
+Les règles sont compilées une fois, puis appliquées à toute la table des trajets
+(analyse_core.table_trajets) par masques vectorisés : chaque motif n'est testé
+qu'une fois par lieu distinct, et non pour chaque trajet.
+"""
+
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+REGLES_MATIN = ('premier_trajet', 'premier_hors_depot')
+REGLES_SOIR = ('dernier_retour_depot', 'dernier_trajet')
+CLES_DEPOT = {'nom', 'lieu', 'regex', 'duree_min', 'plaques', 'ignorer_casse'}
+
+
+def normaliser_plaque(plaque):
+    """Plaque au format des camions chargés : "AB-123-CD" et "AB_123_CD" deviennent "AB 123 CD"."""
+    return " ".join(plaque.replace('_', ' ').replace('-', ' ').split())
+
+
+def _depot_normalise(depot, position):
+    """Vérifie la description d'un dépôt et la complète avec les valeurs par défaut."""
+    if not isinstance(depot, dict):
+        raise ValueError(f"Dépôt n°{position} : un objet JSON est attendu")
+    inconnues = set(depot) - CLES_DEPOT
+    if inconnues:
+        raise ValueError(f"Dépôt n°{position} : clé(s) inconnue(s) {', '.join(sorted(inconnues))}")
+    if ('lieu' in depot) == ('regex' in depot):
+        raise ValueError(f"Dépôt n°{position} : indiquer soit 'lieu', soit 'regex'")
+    motif = depot.get('lieu', depot.get('regex'))
+    if not isinstance(motif, str) or not motif:
+        raise ValueError(f"Dépôt n°{position} : le lieu ou la regex doit être un texte non vide")
+    if 'regex' in depot:
+        try:
+            re.compile(motif)
+        except re.error as e:
+            raise ValueError(f"Dépôt n°{position} : regex invalide ({e})") from e
+    duree_min = depot.get('duree_min', 0)
+    if isinstance(duree_min, bool) or not isinstance(duree_min, (int, float)) or duree_min < 0:
+        raise ValueError(f"Dépôt n°{position} : duree_min doit être un nombre de minutes positif")
+    plaques = depot.get('plaques')
+    if plaques is not None:
+        if not isinstance(plaques, list) or not all(isinstance(plaque, str) for plaque in plaques):
+            raise ValueError(f"Dépôt n°{position} : plaques doit être une liste de textes")
+        plaques = sorted({normaliser_plaque(plaque) for plaque in plaques})
+    return {
+        'nom': str(depot.get('nom', motif)),
+        'lieu': depot.get('lieu'),
+        'regex': depot.get('regex'),
+        'duree_min': duree_min,
+        'plaques': plaques,
+        'ignorer_casse': bool(depot.get('ignorer_casse', False)),
+    }
+
+
+def _compiler(depot):
+    drapeaux = re.IGNORECASE if depot['ignorer_casse'] else 0
+    if depot['lieu'] is not None:
+        return re.compile(re.escape(depot['lieu']), drapeaux)
+    return re.compile(depot['regex'], drapeaux)
+
+
+class ReglesDepot:
+    """
+    Règles matin/soir compilées. Deux règles de même contenu sont égales et ont le
+    même hash : elles peuvent servir de clé pour mémoriser des horaires calculés.
+    """
+
+    def __init__(self, depots, matin='premier_trajet', soir='dernier_retour_depot'):
+        if matin not in REGLES_MATIN:
+            raise ValueError(f"Règle du matin inconnue : {matin} (possibles : {', '.join(REGLES_MATIN)})")
+        if soir not in REGLES_SOIR:
+            raise ValueError(f"Règle du soir inconnue : {soir} (possibles : {', '.join(REGLES_SOIR)})")
+        depots = [_depot_normalise(depot, i + 1) for i, depot in enumerate(depots)]
+        if not depots and (matin, soir) != ('premier_trajet', 'dernier_trajet'):
+            raise ValueError("Aucun dépôt : les règles 'premier_hors_depot' et 'dernier_retour_depot' en ont besoin")
+        self.matin = matin
+        self.soir = soir
+        self.depots = depots
+        # (motif compilé, durée minimale, plaques ou None) de chaque dépôt
+        self._compiles = [
+            (_compiler(depot), pd.Timedelta(minutes=depot['duree_min']),
+             None if depot['plaques'] is None else frozenset(depot['plaques']))
+            for depot in depots
+        ]
+        self.empreinte = json.dumps(self.config(), sort_keys=True, ensure_ascii=False)
+
+    @classmethod
+    def depuis_dict(cls, config):
+        if not isinstance(config, dict):
+            raise ValueError("Règles de dépôt : un objet JSON est attendu")
+        inconnues = set(config) - {'matin', 'soir', 'depots'}
+        if inconnues:
+            raise ValueError(f"Règles de dépôt : clé(s) inconnue(s) {', '.join(sorted(inconnues))}")
+        depots = config.get('depots', [])
+        if not isinstance(depots, list):
+            raise ValueError("Règles de dépôt : 'depots' doit être une liste")
+        return cls(depots, config.get('matin', 'premier_trajet'), config.get('soir', 'dernier_retour_depot'))
+
+    @classmethod
+    def depuis_json(cls, chemin):
+        with open(chemin, encoding='utf-8') as f:
+            try:
+                config = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Règles de dépôt {chemin} : JSON invalide ({e})") from e
+        return cls.depuis_dict(config)
+
+    def config(self):
+        """Description des règles, au format du fichier JSON."""
+        # Clés sans valeur omises (lieu ou regex, plaques) : le résultat se relit avec depuis_dict
+        depots = [{cle: valeur for cle, valeur in depot.items() if valeur is not None} for depot in self.depots]
+        return {'matin': self.matin, 'soir': self.soir, 'depots': depots}
+
+    def __eq__(self, autre):
+        return isinstance(autre, ReglesDepot) and autre.empreinte == self.empreinte
+
+    def __hash__(self):
+        return hash(self.empreinte)
+
+    def __repr__(self):
+        depots = ", ".join(depot['nom'] for depot in self.depots) or "aucun dépôt"
+        return f"ReglesDepot({depots}; {self.matin}, {self.soir})"
+
+    def plaques_inconnues(self, plaques_chargees):
+        """
+        [(nom du dépôt, plaque)] des camions listés dans les règles qui ne font pas partie
+        de `plaques_chargees` : une faute de frappe rattacherait le dépôt à aucun camion.
+        """
+        plaques_chargees = set(plaques_chargees)
+        return [(depot['nom'], plaque) for depot in self.depots
+                for plaque in depot['plaques'] or [] if plaque not in plaques_chargees]
+
+    def _masques_depots(self, trajets):
+        """Pour chaque dépôt : (trajets arrivant à ce dépôt pour un camion rattaché, durée minimale)."""
+        # Les motifs sont testés sur les lieux distincts, puis étendus aux trajets par leur code
+        codes, lieux = pd.factorize(trajets['lieu_arrivee'])
+        plaques = trajets['plaque']
+        masques = []
+        for motif, duree_min, plaques_depot in self._compiles:
+            correspond = np.fromiter((motif.search(str(lieu)) is not None for lieu in lieux), bool, len(lieux))
+            # Code -1 (lieu manquant) : dernier élément, jamais un dépôt
+            masque = np.append(correspond, False)[codes]
+            if plaques_depot is not None:
+                masque &= plaques.isin(plaques_depot).to_numpy()
+            masques.append((masque, duree_min))
+        return masques
+
+    def horaires(self, trajets):
+        """
+        Pour chaque (plaque, date) de `trajets` (table plaque, date, ordre, depart, arrivee,
+        lieu_arrivee) : DataFrame plaque, date, gps_arrivee, gps_depart.
+        """
+        trajets = trajets.sort_values(['plaque', 'date', 'ordre'])
+        masques = self._masques_depots(trajets)
+        premiers = trajets.drop_duplicates(['plaque', 'date'], keep='first')
+
+        if self.matin == 'premier_trajet':
+            matin = premiers[['plaque', 'date', 'arrivee']].rename(columns={'arrivee': 'gps_arrivee'})
+        else:
+            vers_depot = np.logical_or.reduce([masque for masque, _ in masques])
+            hors_depot = (trajets[~vers_depot].drop_duplicates(['plaque', 'date'], keep='first')
+                          [['plaque', 'date', 'arrivee']].rename(columns={'arrivee': 'gps_arrivee'}))
+            matin = premiers[['plaque', 'date']].merge(hors_depot, on=['plaque', 'date'], how='left')
+
+        if self.soir == 'dernier_trajet':
+            valides = trajets
+        else:
+            duree = (trajets['arrivee'] - trajets['depart']).to_numpy()
+            retour = np.logical_or.reduce([masque & (duree >= duree_min.to_timedelta64())
+                                           for masque, duree_min in masques])
+            valides = trajets[retour]
+        soir = (valides.drop_duplicates(['plaque', 'date'], keep='last')
+                [['plaque', 'date', 'depart']].rename(columns={'depart': 'gps_depart'}))
+
+        return matin.merge(soir, on=['plaque', 'date'], how='left')
+
+
+# Dépôt unique de Gardanne, retour d'au moins 25 minutes
+REGLES_DEFAUT = ReglesDepot([{'nom': "Gardanne", 'lieu': "Gardanne", 'duree_min': 25}])
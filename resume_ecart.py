@@ -1,10 +1,17 @@
+import numpy as np
 import pandas as pd
 
+from instrumentation import mesure
+
+@mesure("Résumé par employé", lambda resume: resume[3])
 def generer_resume(resultats_analyses):
-    if not resultats_analyses:
+    # Accepte le DataFrame typé d'analyse_core.analyser_lot ou une liste de dictionnaires
+    if isinstance(resultats_analyses, pd.DataFrame):
+        df = resultats_analyses.copy()
+    elif not resultats_analyses:
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), 0
-
-    df = pd.DataFrame(resultats_analyses)
+    else:
+        df = pd.DataFrame(resultats_analyses)
     if 'date' not in df.columns or df.empty:
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), 0
         
@@ -16,11 +23,9 @@ def generer_resume(resultats_analyses):
     
     jours_analyses = len(df_valide)
 
-    def to_minutes(td):
-        return td.total_seconds() / 60 if pd.notna(td) else 0
-
-    df_valide['ecart_matin_min'] = df_valide['ecart_matin'].apply(to_minutes)
-    df_valide['ecart_soir_min'] = df_valide['ecart_soir'].apply(to_minutes)
+    # Conversion en minutes vectorisée ; un écart manquant compte 0
+    df_valide['ecart_matin_min'] = (pd.to_timedelta(df_valide['ecart_matin']).dt.total_seconds() / 60).fillna(0)
+    df_valide['ecart_soir_min'] = (pd.to_timedelta(df_valide['ecart_soir']).dt.total_seconds() / 60).fillna(0)
     
     # Calcul des MOYENNES
     moyenne_semaine = df_valide.resample('W-MON', label='left', closed='left').agg({'ecart_matin_min': 'mean', 'ecart_soir_min': 'mean'})
@@ -29,4 +34,80 @@ def generer_resume(resultats_analyses):
     # Calcul des SOMMES (pour le mois seulement)
     total_mois = df_valide.resample('M').agg({'ecart_matin_min': 'sum', 'ecart_soir_min': 'sum'})
     
-    return moyenne_semaine, moyenne_mois, total_mois, jours_analyses
\ No newline at end of file
+    return moyenne_semaine, moyenne_mois, total_mois, jours_analyses
+
+COLONNES_RESUMES = ['nom_employe', 'periode', 'debut', 'ecart_matin_moyen', 'ecart_soir_moyen',
+                    'ecart_matin_total', 'ecart_soir_total', 'nb_jours']
+
+def _debut_periode(dates, periode):
+    # Semaines commençant le lundi (comme 'W-MON', label='left'), mois au premier du mois
+    if periode == 'semaine':
+        return dates - pd.to_timedelta(dates.dt.weekday, unit='D')
+    return pd.Series(dates.to_numpy().astype('datetime64[M]').astype('datetime64[ns]'), index=dates.index)
+
+def _toutes_periodes(index, periode):
+    """Index (nom_employe, debut) de toutes les périodes entre la première et la dernière de chaque employé."""
+    bornes = index.to_frame(index=False).groupby('nom_employe', sort=True)['debut'].agg(['min', 'max'])
+    if periode == 'semaine':
+        unite, pas = 'datetime64[D]', 7
+    else:
+        unite, pas = 'datetime64[M]', 1
+    premier = bornes['min'].to_numpy().astype(unite).astype('int64')
+    dernier = bornes['max'].to_numpy().astype(unite).astype('int64')
+    longueurs = (dernier - premier) // pas + 1
+    rang = np.arange(longueurs.sum()) - np.repeat(np.cumsum(longueurs) - longueurs, longueurs)
+    debuts = (np.repeat(premier, longueurs) + rang * pas).astype(unite).astype('datetime64[ns]')
+    return pd.MultiIndex.from_arrays([np.repeat(bornes.index.to_numpy(), longueurs), debuts],
+                                     names=['nom_employe', 'debut'])
+
+@mesure("Résumés", len)
+def generer_resumes(resultats, periodes_vides=True):
+    """
+    Résumés de tous les employés en un seul passage sur les lignes, sans boucle par employé.
+    resultats : DataFrame d'analyse_core.analyser_lot, pour un ou plusieurs employés.
+    Retourne un DataFrame « long », une ligne par employé et par période :
+    nom_employe, periode ('semaine' ou 'mois'), debut (lundi ou premier du mois),
+    moyennes et totaux des écarts matin/soir en minutes, nb_jours (jours avec écart).
+    Comme generer_resume, seuls les jours avec au moins un écart comptent et l'écart
+    manquant de l'autre côté vaut 0 minute. Avec periodes_vides, les périodes sans jour
+    analysé entre la première et la dernière d'un employé sont présentes (nb_jours = 0).
+    """
+    valides = resultats.dropna(subset=['ecart_matin', 'ecart_soir'], how='all')
+    if valides.empty:
+        return pd.DataFrame({
+            'nom_employe': pd.Series(dtype=object), 'periode': pd.Series(dtype=object),
+            'debut': pd.Series(dtype='datetime64[ns]'),
+            **{col: pd.Series(dtype=float) for col in COLONNES_RESUMES[3:7]},
+            'nb_jours': pd.Series(dtype='int64'),
+        })
+
+    dates = pd.to_datetime(valides['date']).dt.normalize()
+    lignes = pd.DataFrame({
+        'nom_employe': valides['nom_employe'].astype(object),
+        'ecart_matin': (valides['ecart_matin'].dt.total_seconds() / 60).fillna(0),
+        'ecart_soir': (valides['ecart_soir'].dt.total_seconds() / 60).fillna(0),
+    })
+    morceaux = []
+    for periode in ('semaine', 'mois'):
+        # Moyenne, somme et nombre en une seule agrégation groupée par (employé, période)
+        resume = lignes.assign(debut=_debut_periode(dates, periode)).groupby(['nom_employe', 'debut'], sort=True).agg(
+            ecart_matin_moyen=('ecart_matin', 'mean'),
+            ecart_soir_moyen=('ecart_soir', 'mean'),
+            ecart_matin_total=('ecart_matin', 'sum'),
+            ecart_soir_total=('ecart_soir', 'sum'),
+            nb_jours=('ecart_matin', 'size'),
+        )
+        if periodes_vides:
+            resume = resume.reindex(_toutes_periodes(resume.index, periode))
+            resume = resume.fillna({'ecart_matin_total': 0, 'ecart_soir_total': 0, 'nb_jours': 0})
+            resume['nb_jours'] = resume['nb_jours'].astype('int64')
+        morceaux.append(resume.reset_index().assign(periode=periode))
+    return pd.concat(morceaux, ignore_index=True)[COLONNES_RESUMES]
+
+def resumes_historique(historique, debut=None, fin=None, employes=None, periodes_vides=True):
+    """
+    Résumés (generer_resumes) des employé-jours enregistrés dans l'historique
+    (historique.HistoriqueAnalyses) entre debut et fin inclus, sans relire les classeurs.
+    Les semaines et mois coupés par les bornes ne comptent que les jours de la période.
+    """
+    return generer_resumes(historique.lire(debut, fin, employes), periodes_vides)
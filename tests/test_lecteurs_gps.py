@@ -0,0 +1,85 @@
+# tests/test_lecteurs_gps.py
+
+"""
+Les lecteurs de classeurs GPS (analyse_core.LECTEURS_GPS) donnent exactement les
+mêmes trajets que le lecteur 'pandas' d'origine, sur des classeurs générés
+(benchmarks.generateurs) : classeurs typiques et classeur aux feuilles atypiques.
+
+    python -m unittest discover -s tests -t .
+"""
+
+import datetime
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import analyse_core
+from benchmarks.generateurs import generer_classeur_atypique, generer_fichiers_gps
+
+CALAMINE = analyse_core._calamine_disponible()
+
+
+class LecteursGPS(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dossier = tempfile.mkdtemp(prefix='gps_')
+        cls.typiques = generer_fichiers_gps(cls.dossier, nb_camions=2, nb_semaines=2, nb_trajets=12)
+        cls.atypique = generer_classeur_atypique(cls.dossier)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dossier, ignore_errors=True)
+
+    def assertMemesTrajets(self, reference, donnees):
+        self.assertEqual(reference.keys(), donnees.keys())
+        for plaque, jours in reference.items():
+            self.assertEqual(jours.keys(), donnees[plaque].keys(), plaque)
+            for date_str, trajets in jours.items():
+                pd.testing.assert_frame_equal(trajets, donnees[plaque][date_str], obj=f"{plaque} {date_str}")
+
+    def assertLecteurIdentique(self, lecteur):
+        for chemins in (self.typiques, [self.atypique]):
+            reference = analyse_core.charger_fichiers_gps(chemins, lecteur='pandas')
+            self.assertMemesTrajets(reference, analyse_core.charger_fichiers_gps(chemins, lecteur=lecteur))
+            # Sans le repli sur 'pandas' de _lire_feuilles_gps, qui masquerait un écart
+            for chemin in chemins:
+                attendu = analyse_core._jours_gps(analyse_core._feuilles_gps_pandas(chemin, *analyse_core.FEUILLES_JOURS_GPS))
+                obtenu = analyse_core._jours_gps(analyse_core.LECTEURS_GPS[lecteur](chemin, *analyse_core.FEUILLES_JOURS_GPS))
+                self.assertEqual([date for date, _ in attendu], [date for date, _ in obtenu])
+                for (date_str, trajets), (_, trajets_lus) in zip(attendu, obtenu):
+                    pd.testing.assert_frame_equal(trajets, trajets_lus, obj=date_str)
+
+    def test_flux(self):
+        self.assertLecteurIdentique('flux')
+
+    @unittest.skipUnless(CALAMINE, "python-calamine n'est pas installé")
+    def test_calamine(self):
+        self.assertLecteurIdentique('calamine')
+
+    @unittest.skipIf(CALAMINE, "python-calamine est installé")
+    def test_calamine_absent(self):
+        with self.assertRaises(ValueError):
+            analyse_core.charger_fichiers_gps(self.typiques, lecteur='calamine')
+
+    def test_lecture_parallele(self):
+        reference = analyse_core.charger_fichiers_gps(self.typiques, lecteur='pandas')
+        self.assertMemesTrajets(reference, analyse_core.charger_fichiers_gps(self.typiques, nb_processus=2,
+                                                                            lecteur='flux'))
+
+    def test_journee_sans_trajet(self):
+        # Date en B5, aucun texte en colonne B : la feuille est ignorée, les autres jours sont gardés
+        for lecteur in ('pandas', 'flux'):
+            donnees = analyse_core.charger_fichiers_gps([self.atypique], lecteur=lecteur)
+            self.assertEqual(sorted(donnees['ZZ 999 ZZ']), ['2024-01-01', '2024-01-03'], lecteur)
+        valeurs = np.full((10, 7), np.nan, dtype=object)
+        valeurs[4, 1] = datetime.datetime(2024, 1, 4)
+        valeurs[7, 1] = 0
+        self.assertTrue(analyse_core.extraire_trajets(pd.DataFrame(valeurs)).empty)
+
+
+if __name__ == '__main__':
+    unittest.main()